@@ -1,18 +1,33 @@
 """Neo4j GraphRAG implementation for Obsidian vaults."""
 
+from importlib import import_module
+
 __version__ = "0.1.0"
 
-from .core import ObsidianGraphRAG
-from .models import Entity, Note, Relationship
-from .services import EntityDetectionService, KnowledgeGraphService, QueryService
+# Public names and the modules defining them, imported on first access so
+# that loading graphrag.config or graphrag.models skips the Neo4j/OpenAI SDKs
+_EXPORTS = {
+    "ObsidianGraphRAG": ".core",
+    "Entity": ".models",
+    "Note": ".models",
+    "Relationship": ".models",
+    "EntityDetectionService": ".services",
+    "KnowledgeGraphService": ".services",
+    "QueryService": ".services",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    """Import a public name from its defining module on first use."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
 
-__all__ = [
-    "ObsidianGraphRAG",
-    "Entity",
-    "Note",
-    "Relationship",
-    "EntityDetectionService",
-    "KnowledgeGraphService",
-    "QueryService",
-]
 
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -30,22 +30,66 @@ class Config:
     OPENAI_MODEL_ENTITY_DETECTION: str = os.getenv(
         "OPENAI_MODEL_ENTITY_DETECTION", "gpt-4o-mini")
     OPENAI_MODEL_QUERY: str = os.getenv("OPENAI_MODEL_QUERY", "gpt-4o")
+    OPENAI_MAX_RETRIES: int = int(os.getenv("OPENAI_MAX_RETRIES", "5"))
+    OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+    OPENAI_TIMEOUT: float = float(os.getenv("OPENAI_TIMEOUT", "30"))  # seconds
 
     # GraphRAG Configuration
     VECTOR_INDEX_NAME: str = os.getenv(
         "VECTOR_INDEX_NAME", "noteContentEmbedding")
     FULLTEXT_INDEX_NAME: str = os.getenv("FULLTEXT_INDEX_NAME", "noteFulltext")
     CONTEXT_WINDOW_SIZE: int = int(os.getenv("CONTEXT_WINDOW_SIZE", "20"))
+    NOTE_SUMMARY_LENGTH: int = int(os.getenv("NOTE_SUMMARY_LENGTH", "1000"))
+    MAX_CONTEXT_TOKENS: int = int(os.getenv("MAX_CONTEXT_TOKENS", "8000"))
+
+    # Semantic Cache Configuration
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv(
+        "SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(
+        os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # cosine similarity
+    SEMANTIC_CACHE_TTL: float = float(
+        os.getenv("SEMANTIC_CACHE_TTL", "3600"))  # seconds
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(
+        os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(
+        os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "4096"))
+    ANSWER_CACHE_PATH: str = os.getenv("ANSWER_CACHE_PATH", "")  # empty disables
+    ANSWER_CACHE_TTL: float = float(
+        os.getenv("ANSWER_CACHE_TTL", "86400"))  # seconds
+
+    # Embedding Configuration
+    EMBEDDING_MODEL: str = os.getenv(
+        "EMBEDDING_MODEL", "text-embedding-ada-002")
+    EMBEDDING_DIMENSIONS: int = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_FLUSH_INTERVAL: float = float(
+        os.getenv("EMBEDDING_FLUSH_INTERVAL", "0.2"))  # seconds
+    EMBEDDING_CACHE_PATH: str = os.getenv(
+        "EMBEDDING_CACHE_PATH", "~/.cache/graphrag/embeddings.sqlite3")
+    LOCAL_VECTOR_INDEX: bool = os.getenv(
+        "LOCAL_VECTOR_INDEX", "false").lower() == "true"
+    LOCAL_VECTOR_INDEX_DTYPE: str = os.getenv(
+        "LOCAL_VECTOR_INDEX_DTYPE", "float32").lower()  # float32 or float16
 
     # File Watching Configuration
     OBSIDIAN_VAULT_PATH: str = os.getenv("OBSIDIAN_VAULT_PATH", "")
     IGNORE_PATTERNS: list = os.getenv(
         "IGNORE_PATTERNS", "⭕Meta/**,.git/**,.obsidian/**").split(",")
+    FILE_WATCHER_WORKERS: int = int(os.getenv("FILE_WATCHER_WORKERS", "8"))
+    # "auto" polls only on network/FUSE mounts; "true"/"false" force it
+    FILE_WATCHER_POLLING: str = os.getenv(
+        "FILE_WATCHER_POLLING", "auto").lower()
+    FILE_WATCHER_POLL_INTERVAL: float = float(
+        os.getenv("FILE_WATCHER_POLL_INTERVAL", "2.0"))  # seconds
 
     # Processing Configuration
     MAX_NOTE_SIZE: int = int(os.getenv("MAX_NOTE_SIZE", "100000"))  # 100KB
     ENTITY_DETECTION_BATCH_SIZE: int = int(
         os.getenv("ENTITY_DETECTION_BATCH_SIZE", "5"))
+    NOTE_UPSERT_BATCH_SIZE: int = int(
+        os.getenv("NOTE_UPSERT_BATCH_SIZE", "500"))
+    NOTE_READ_WORKERS: int = int(os.getenv("NOTE_READ_WORKERS", "8"))
 
     @classmethod
     def get_neo4j_config(cls) -> dict:
@@ -68,6 +112,13 @@ class Config:
     @classmethod
     def validate(cls) -> bool:
         """Validate that required configuration is present."""
+        neo4j_config = cls.get_neo4j_config()
+        if not neo4j_config["uri"]:
+            raise ValueError("Neo4j URI is required")
+
+        if not neo4j_config["user"] or not neo4j_config["password"]:
+            raise ValueError("Neo4j credentials are required")
+
         if not cls.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY is required")
 
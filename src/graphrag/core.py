@@ -4,20 +4,27 @@ from typing import Set
 from datetime import datetime
 import logging
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
+import yaml
 from rich.console import Console
 from rich.table import Table
 
 from .config import Config
 from .models import Note, QueryResult
 from .services import EntityDetectionService, KnowledgeGraphService, QueryService
-from .services.file_watcher import FileWatcherService
+from .services.file_watcher import (EXTERNAL_LINK_PATTERN, INTERNAL_LINK_PATTERN,
+                                    YAML_LOADER, FileWatcherService)
 
 logger = logging.getLogger(__name__)
 console = Console()
 
+# "(context: N)" in a chat message sets how many notes to retrieve
+CONTEXT_SIZE_PATTERN = re.compile(r"\(context:\s*(\d+)\)")
+
 
 class ObsidianGraphRAG:
     """Main class for the Obsidian GraphRAG system."""
@@ -33,7 +40,7 @@ class ObsidianGraphRAG:
         # Initialize services
         self.entity_detection_service = EntityDetectionService()
         self.kg_service = KnowledgeGraphService()
-        self.query_service = QueryService(self.kg_service)
+        self.query_service = QueryService.shared(self.kg_service)
         self.file_watcher = FileWatcherService(
             self.vault_path,
             self.entity_detection_service,
@@ -60,35 +67,50 @@ class ObsidianGraphRAG:
 
             # Process files in batches
             processed_count = 0
+            failed_count = 0
             total_files = len(markdown_files)
+            batch_size = Config.NOTE_UPSERT_BATCH_SIZE
 
-            for i, file_path in enumerate(markdown_files, 1):
-                try:
-                    console.print(
-                        f"Processing {i}/{total_files}: {file_path.name}")
-
-                    # Read and process the note
-                    note = self._read_note_file(file_path)
-                    if note:
-                        # Detect entities
-                        detection_result = self.entity_detection_service.detect_entities(
-                            note)
-
-                        # Add to knowledge graph
-                        self._add_note_to_knowledge_graph(
-                            note, detection_result)
+            with ThreadPoolExecutor(max_workers=Config.NOTE_READ_WORKERS) as read_pool:
+                for start in range(0, total_files, batch_size):
+                    batch_files = markdown_files[start:start + batch_size]
 
-                        processed_count += 1
+                    # Read the whole batch concurrently while notes are processed
+                    reads = [read_pool.submit(self._read_note_file, file_path)
+                             for file_path in batch_files]
+                    pending = []
 
-                        # Show progress
-                        if i % 10 == 0:
+                    for i, (file_path, read) in enumerate(zip(batch_files, reads), start + 1):
+                        try:
                             console.print(
-                                f"Progress: {i}/{total_files} files processed")
+                                f"Processing {i}/{total_files}: {file_path.name}")
+
+                            # Read and process the note
+                            note = read.result()
+                            if note:
+                                # Detect entities
+                                detection_result = self.entity_detection_service.detect_entities(
+                                    note)
+                                pending.append((note, detection_result))
+
+                                # Show progress
+                                if i % 10 == 0:
+                                    console.print(
+                                        f"Progress: {i}/{total_files} files processed")
+
+                        except Exception as e:
+                            console.print(
+                                f"[red]Error processing {file_path}: {e}[/red]")
+                            logger.error(f"Error processing {file_path}: {e}")
 
-                except Exception as e:
-                    console.print(
-                        f"[red]Error processing {file_path}: {e}[/red]")
-                    logger.error(f"Error processing {file_path}: {e}")
+                    # Write the batch's notes to the graph
+                    added, failed = self._add_notes_to_knowledge_graph(
+                        pending)
+                    processed_count += added
+                    failed_count += failed
+
+            # Embed the last partial batch now rather than on the flush timer
+            self.kg_service.flush_note_embeddings()
 
             # Get final statistics
             stats = self.kg_service.get_graph_stats()
@@ -96,11 +118,15 @@ class ObsidianGraphRAG:
             console.print(
                 f"[bold green]Knowledge graph built successfully![/bold green]")
             console.print(f"Processed {processed_count} files")
+            if failed_count:
+                console.print(
+                    f"[yellow]Failed to add {failed_count} notes[/yellow]")
             console.print(f"Graph statistics: {stats}")
 
             return {
                 "status": "success",
                 "files_processed": processed_count,
+                "files_failed": failed_count,
                 "total_files": total_files,
                 "graph_stats": stats
             }
@@ -186,9 +212,19 @@ class ObsidianGraphRAG:
                 if not user_input:
                     continue
 
-                # Process the query
-                result = self.query_service.chat_query(
-                    user_input, conversation_history)
+                question, context_size = self._parse_context_size(user_input)
+
+                # Process the query, printing the answer as it streams in
+                console.print("[bold blue]Assistant:[/bold blue] ", end="")
+                result = None
+                for chunk in self.query_service.chat_query_stream(
+                        question, conversation_history, context_size):
+                    if isinstance(chunk, QueryResult):
+                        result = chunk
+                    else:
+                        console.print(chunk, end="", markup=False,
+                                      highlight=False)
+                console.print()
 
                 # Add to conversation history
                 conversation_history.append({
@@ -250,34 +286,49 @@ class ObsidianGraphRAG:
     def _get_all_markdown_files(self) -> List[Path]:
         """Get all markdown files in the vault."""
         markdown_files = []
-        vault_path = Path(self.vault_path)
+        directories = [str(Path(self.vault_path))]
 
-        for file_path in vault_path.rglob("*.md"):
-            # Check if file should be ignored
-            if not self._should_ignore_file(file_path):
-                markdown_files.append(file_path)
+        # Walk with scandir so file types come from the directory listing
+        # rather than one stat() per entry
+        while directories:
+            try:
+                with os.scandir(directories.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            # Every file below is ignored if the directory path
+                            # already contains a pattern, so skip descending
+                            directory = entry.path + os.sep
+                            if not any(pattern in directory
+                                       for pattern in Config.IGNORE_PATTERNS):
+                                directories.append(entry.path)
+                        elif entry.name.endswith(".md") and entry.is_file():
+                            file_path = Path(entry.path)
+                            if not self._should_ignore_file(file_path):
+                                markdown_files.append(file_path)
+            except OSError as e:
+                logger.error(f"Error scanning directory: {e}")
 
         return sorted(markdown_files)
 
     def _should_ignore_file(self, file_path: Path) -> bool:
         """Check if a file should be ignored."""
-        for pattern in Config.IGNORE_PATTERNS:
-            if pattern in str(file_path):
-                return True
-        return False
+        path = str(file_path)
+        return any(pattern in path for pattern in Config.IGNORE_PATTERNS)
 
     def _read_note_file(self, file_path: Path) -> Optional[Note]:
         """Read and parse a note file."""
         try:
-            # Check file size
-            if file_path.stat().st_size > Config.MAX_NOTE_SIZE:
-                console.print(
-                    f"[yellow]File too large, skipping: {file_path}[/yellow]")
-                return None
+            # Stat and read through one descriptor: one lookup of the path,
+            # and the size check sees the same file that is read
+            with open(file_path, 'rb') as note_file:
+                stat = os.fstat(note_file.fileno())
+                if stat.st_size > Config.MAX_NOTE_SIZE:
+                    console.print(
+                        f"[yellow]File too large, skipping: {file_path}[/yellow]")
+                    return None
 
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+                # Read file content in one call, bypassing the text I/O layer
+                content = note_file.read().decode('utf-8')
 
             # Parse frontmatter and content
             frontmatter, note_content = self._parse_frontmatter(content)
@@ -299,7 +350,7 @@ class ObsidianGraphRAG:
                 frontmatter=frontmatter,
                 tags=tags,
                 links=links,
-                last_modified=datetime.fromtimestamp(file_path.stat().st_mtime)
+                last_modified=datetime.fromtimestamp(stat.st_mtime)
             )
 
             return note
@@ -311,77 +362,72 @@ class ObsidianGraphRAG:
 
     def _parse_frontmatter(self, content: str) -> tuple[Dict, str]:
         """Parse YAML frontmatter from note content."""
-        import yaml
-
         frontmatter = {}
         note_content = content
 
         # Check if content starts with frontmatter
         if content.startswith('---'):
-            try:
-                # Find frontmatter boundaries
-                parts = content.split('---', 2)
-                if len(parts) >= 3:
-                    frontmatter_text = parts[1].strip()
-                    note_content = parts[2].strip()
-
-                    # Parse YAML frontmatter
-                    if frontmatter_text:
-                        frontmatter = yaml.safe_load(frontmatter_text) or {}
-
-            except yaml.YAMLError as e:
-                console.print(
-                    f"[yellow]Failed to parse frontmatter: {e}[/yellow]")
+            # Find the closing marker without splitting the whole note
+            end = content.find('\n---', 3)
+            if end != -1:
+                frontmatter_text = content[3:end].strip()
+                note_content = content[end + 4:].strip()
+
+                # Parse YAML frontmatter
+                if frontmatter_text:
+                    try:
+                        frontmatter = yaml.load(
+                            frontmatter_text, Loader=YAML_LOADER) or {}
+                    except yaml.YAMLError as e:
+                        console.print(
+                            f"[yellow]Failed to parse frontmatter: {e}[/yellow]")
 
         return frontmatter, note_content
 
     def _extract_links(self, content: str) -> Set[str]:
         """Extract Obsidian links from note content."""
-        import re
+        links = set(INTERNAL_LINK_PATTERN.findall(content))
+        links.update(EXTERNAL_LINK_PATTERN.findall(content))
+        return links
 
-        links = set()
+    def _add_notes_to_knowledge_graph(self, pending: List) -> Tuple[int, int]:
+        """Add a batch of (note, detection_result) pairs to the knowledge graph.
 
-        # Extract [[internal links]]
-        internal_links = re.findall(r'\[\[([^\]]+)\]\]', content)
-        links.update(internal_links)
+        Returns the number of notes added and the number that failed.
+        """
+        if not pending:
+            return 0, 0
 
-        # Extract [external links](url)
-        external_links = re.findall(r'\[([^\]]+)\]\([^)]+\)', content)
-        links.update(external_links)
+        # Create or update all note nodes in one batched write; if it fails,
+        # skip this batch and let the build carry on with the next one
+        try:
+            self.kg_service.bulk_upsert_notes([note for note, _ in pending])
+        except Exception as e:
+            console.print(
+                f"[red]Error writing batch of {len(pending)} notes: {e}[/red]")
+            logger.error(f"Error writing batch of {len(pending)} notes: {e}")
+            return 0, len(pending)
 
-        return links
+        added = 0
+        for note, detection_result in pending:
+            try:
+                self._add_note_to_knowledge_graph(
+                    note, detection_result, create_note=False)
+                added += 1
+            except Exception as e:
+                console.print(
+                    f"[red]Error processing {note.file_path}: {e}[/red]")
+                logger.error(f"Error processing {note.file_path}: {e}")
+        return added, len(pending) - added
 
-    def _add_note_to_knowledge_graph(self, note: Note, detection_result):
+    def _add_note_to_knowledge_graph(self, note: Note, detection_result,
+                                     create_note: bool = True):
         """Add a note and its entities to the knowledge graph."""
         try:
-            # Create or update the note node
-            self.kg_service.create_note_node(note)
-
-            # Create entity nodes
-            entity_names = []
-            for entity in detection_result.entities:
-                self.kg_service.create_entity_node(entity)
-                entity_names.append(entity.name)
-
-            # Link note to entities
-            if entity_names:
-                self.kg_service.link_note_to_entities(
-                    note.file_path, entity_names)
-
-            # Create relationships between entities
-            for relationship in detection_result.relationships:
-                # Find entity names by ID
-                source_entity = next(
-                    (e for e in detection_result.entities if e.id == relationship.source_entity_id), None)
-                target_entity = next(
-                    (e for e in detection_result.entities if e.id == relationship.target_entity_id), None)
-
-                if source_entity and target_entity:
-                    self.kg_service.create_relationship(
-                        relationship,
-                        source_entity.name,
-                        target_entity.name
-                    )
+            # Write the note, its entities and relationships in one transaction
+            self.kg_service.write_note_graph(
+                note, detection_result.entities, detection_result.relationships,
+                create_note=create_note)
 
             # Update embeddings
             self.kg_service.update_note_embeddings(note)
@@ -438,11 +484,23 @@ class ObsidianGraphRAG:
         except Exception as e:
             console.print(f"[red]Failed to get graph statistics: {e}[/red]")
 
+    @staticmethod
+    def _parse_context_size(user_input: str) -> tuple[str, Optional[int]]:
+        """Split an optional "(context: N)" marker out of a chat message."""
+        match = CONTEXT_SIZE_PATTERN.search(user_input)
+        if match is None:
+            return user_input, None
+
+        question = " ".join(
+            (user_input[:match.start()] + " " + user_input[match.end():]).split())
+        return question, int(match.group(1))
+
     def _show_help(self):
         """Show available commands."""
         help_text = """
 Available Commands:
 • Type your question to query the knowledge graph
+• Add '(context: N)' to a question to retrieve N notes
 • 'stats' - Show knowledge graph statistics
 • 'help' - Show this help message
 • 'quit', 'exit', or 'q' - End the chat
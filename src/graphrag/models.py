@@ -1,11 +1,11 @@
 """Data models for the GraphRAG system."""
 
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Dict, List, Optional, Set
 from uuid import UUID, uuid4
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class EntityType(str, Enum):
@@ -23,7 +23,7 @@ class EntityType(str, Enum):
 class Entity(BaseModel):
     """Represents an entity detected in a note."""
     id: UUID = Field(default_factory=uuid4)
-    name: str
+    name: str = Field(min_length=1)
     entity_type: EntityType
     confidence: float = Field(ge=0.0, le=1.0)
     aliases: Set[str] = Field(default_factory=set)
@@ -74,6 +74,13 @@ class Relationship(BaseModel):
     properties: Dict[str, Any] = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    @model_validator(mode="after")
+    def _check_distinct_entities(self) -> "Relationship":
+        """Reject relationships from an entity to itself."""
+        if self.source_entity_id == self.target_entity_id:
+            raise ValueError("source and target entities must differ")
+        return self
+
 
 class QueryResult(BaseModel):
     """Result of a query to the knowledge graph."""
@@ -81,7 +88,7 @@ class QueryResult(BaseModel):
     context_notes: List[Note]
     citations: List[str]
     confidence: float
-    query_time: datetime = Field(default_factory=datetime.utcnow)
+    query_time: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
 class EntityDetectionResult(BaseModel):
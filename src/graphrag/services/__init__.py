@@ -1,11 +1,28 @@
 """Services for the GraphRAG system."""
 
-from .entity_detection import EntityDetectionService
-from .knowledge_graph import KnowledgeGraphService
-from .query import QueryService
-
-__all__ = [
-    "EntityDetectionService",
-    "KnowledgeGraphService",
-    "QueryService",
-]
+from importlib import import_module
+
+# Public names and the modules defining them, imported on first access so
+# that loading one service module does not import every service's SDKs
+_EXPORTS = {
+    "EntityDetectionService": ".entity_detection",
+    "KnowledgeGraphService": ".knowledge_graph",
+    "QueryService": ".query",
+    "get_query_service": ".query",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    """Import a public name from its defining module on first use."""
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,72 @@
+"""Persistent cache of query answers keyed by question and context."""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from ..models import Note, QueryResult
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCache:
+    """SQLite-backed store of query results shared across processes and restarts."""
+
+    def __init__(self, path: str, ttl: float):
+        """Open (or create) the cache database at the given path."""
+        if path != ":memory:":
+            Path(path).expanduser().parent.mkdir(parents=True, exist_ok=True)
+            path = str(Path(path).expanduser())
+
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers "
+            "(key TEXT PRIMARY KEY, result TEXT NOT NULL, expires_at REAL NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def key(question: str, context_notes: List[Note]) -> str:
+        """Key an answer on the question and the notes it was generated from."""
+        context = hashlib.blake2b(digest_size=16)
+        for note in sorted(context_notes, key=lambda n: n.file_path):
+            context.update(note.file_path.encode("utf-8") + b"\0")
+            context.update(note.content.encode("utf-8") + b"\0")
+
+        question_hash = hashlib.blake2b(question.encode("utf-8"), digest_size=16)
+        return f"{question_hash.hexdigest()}:{context.hexdigest()}"
+
+    def get(self, key: str) -> Optional[QueryResult]:
+        """Return the cached result for a key, if present and unexpired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM answers WHERE key = ? AND expires_at > ?",
+                (key, time.time())).fetchone()
+        if row is None:
+            return None
+
+        try:
+            return QueryResult.model_validate_json(row[0])
+        except ValueError as e:
+            logger.warning(f"Discarding unreadable cached answer: {e}")
+            return None
+
+    def put(self, key: str, result: QueryResult):
+        """Store a result, dropping any entries that have expired."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE expires_at <= ?", (now,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, result, expires_at) VALUES (?, ?, ?)",
+                (key, result.model_dump_json(), now + self.ttl))
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,83 @@
+"""Persistent cache of note embeddings keyed by model and content hash."""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """SQLite-backed store mapping content hashes to embedding vectors."""
+
+    # Hashes looked up per SELECT, kept under SQLite's bound-parameter limit
+    LOOKUP_CHUNK_SIZE = 500
+
+    def __init__(self, path: str, model: str = ""):
+        """Open (or create) the cache database at the given path.
+
+        Vectors are stored per model, so changing the embedding model or its
+        dimensions never returns vectors produced by the previous one.
+        """
+        self._key_prefix = model.encode("utf-8") + b"\0"
+        if path != ":memory:":
+            Path(path).expanduser().parent.mkdir(parents=True, exist_ok=True)
+            path = str(Path(path).expanduser())
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            # Readers in other processes do not block on a writer
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vec BLOB NOT NULL)")
+        self._conn.commit()
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        """Hash note content into a cache key."""
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _key(self, content_hash: str) -> str:
+        """Row key for a content hash under this cache's model."""
+        return hashlib.blake2b(
+            self._key_prefix + content_hash.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, content_hash: str) -> Optional[List[float]]:
+        """Return the cached embedding for a hash, if present."""
+        return self.get_many([content_hash]).get(content_hash)
+
+    def get_many(self, content_hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """Return cached embeddings for every hash that is present."""
+        found = {}
+        hashes_by_key = {self._key(h): h for h in set(content_hashes)}
+        keys = list(hashes_by_key)
+        with self._lock:
+            for start in range(0, len(keys), self.LOOKUP_CHUNK_SIZE):
+                chunk = keys[start:start + self.LOOKUP_CHUNK_SIZE]
+                rows = self._conn.execute(
+                    "SELECT hash, vec FROM embeddings WHERE hash IN "
+                    f"({','.join('?' * len(chunk))})", chunk)
+                for key, vec in rows:
+                    found[hashes_by_key[key]] = array("f", vec).tolist()
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]):
+        """Store embeddings for the given hashes."""
+        if not vectors:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (hash, vec) VALUES (?, ?)",
+                [(self._key(h), array("f", vec).tobytes())
+                 for h, vec in vectors.items()])
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
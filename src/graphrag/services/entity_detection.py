@@ -3,6 +3,7 @@
 import time
 import json
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Optional, Tuple
 
@@ -11,6 +12,21 @@ from openai import OpenAI
 
 from ..config import Config
 from ..models import Entity, EntityType, EntityDetectionResult, Note, Relationship, RelationshipType
+from .openai_http import shared_http_client
+
+ENTITY_TYPES_FILE = Path(__file__).parent.parent.parent.parent / "entity_types.txt"
+
+
+@lru_cache(maxsize=None)
+def _read_entity_types(entity_types_file: Path) -> Tuple[str, ...]:
+    """Parse an entity types file once per process."""
+    if entity_types_file.exists():
+        with open(entity_types_file, 'r') as f:
+            content = f.read()
+            # Extract entity types from the file
+            types = re.findall(r'"([^"]+)"', content)
+            return tuple(t for t in types if t and not t.startswith(('0', '1', '2', '3', '4', '5', '6', '7', '8', '9')))
+    return ()
 
 
 class EntityDetectionService:
@@ -18,7 +34,8 @@ class EntityDetectionService:
 
     def __init__(self):
         """Initialize the entity detection service."""
-        self.client = OpenAI(api_key=Config.OPENAI_API_KEY)
+        self.client = OpenAI(api_key=Config.OPENAI_API_KEY,
+                             http_client=shared_http_client())
         self.model = Config.OPENAI_MODEL_ENTITY_DETECTION
 
         # Load entity types from the entity_types.txt file
@@ -26,15 +43,7 @@ class EntityDetectionService:
 
     def _load_entity_types(self) -> List[str]:
         """Load entity types from the entity_types.txt file."""
-        entity_types_file = Path(
-            __file__).parent.parent.parent.parent / "entity_types.txt"
-        if entity_types_file.exists():
-            with open(entity_types_file, 'r') as f:
-                content = f.read()
-                # Extract entity types from the file
-                types = re.findall(r'"([^"]+)"', content)
-                return [t for t in types if t and not t.startswith(('0', '1', '2', '3', '4', '5', '6', '7', '8', '9'))]
-        return []
+        return list(_read_entity_types(ENTITY_TYPES_FILE))
 
     def detect_entities(self, note: Note) -> EntityDetectionResult:
         """Detect entities and relationships from a note."""
@@ -1,37 +1,80 @@
 """File watcher service for monitoring Obsidian vault changes."""
 
 from datetime import datetime
+import heapq
 import logging
 import os
+import re
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
+import yaml
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
 
 from ..config import Config
 from ..models import Note
+from .embedding_cache import EmbeddingCache
 from .entity_detection import EntityDetectionService
 from .knowledge_graph import KnowledgeGraphService
 
 logger = logging.getLogger(__name__)
 
+# Prefer the libyaml-backed loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# [[internal links]] and the text of [external links](url)
+INTERNAL_LINK_PATTERN = re.compile(r'\[\[([^\]]+)\]\]')
+EXTERNAL_LINK_PATTERN = re.compile(r'\[([^\]]+)\]\([^)]+\)')
+
+# Filesystems on which inotify/FSEvents miss remote changes
+NETWORK_FILESYSTEMS = {"nfs", "nfs4", "cifs", "smbfs", "smb3", "9p", "afs"}
+
+
+def get_filesystem_type(path: Path) -> Optional[str]:
+    """Return the filesystem type of the mount containing path, if known."""
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as f:
+            mounts = [line.split()[1:3] for line in f if line.strip()]
+    except OSError:
+        return None
+
+    resolved = str(path.resolve())
+    best_mount, best_type = "", None
+    for mount_point, fs_type in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        if (resolved == mount_point
+                or resolved.startswith(mount_point.rstrip("/") + "/")) \
+                and len(mount_point) > len(best_mount):
+            best_mount, best_type = mount_point, fs_type
+    return best_type
+
+
+def is_network_filesystem(path: Path) -> bool:
+    """Check whether path lives on a network or FUSE mount."""
+    fs_type = get_filesystem_type(path)
+    if fs_type is None:
+        return False
+    return fs_type in NETWORK_FILESYSTEMS or fs_type.startswith("fuse.")
+
 
 class ObsidianFileHandler(FileSystemEventHandler):
     """Handler for Obsidian file system events."""
 
-    def __init__(self, vault_path: Path, callback: Callable[[Note, str], None]):
+    def __init__(self, vault_path: Path, callback: Callable[..., None]):
         """Initialize the file handler."""
         self.vault_path = vault_path
         self.callback = callback
         self.ignored_patterns = Config.IGNORE_PATTERNS
-        self.processing_files: Set[str] = set()
 
-    def should_ignore(self, file_path: Path) -> bool:
+    def should_ignore(self, file_path: str) -> bool:
         """Check if a file should be ignored."""
         for pattern in self.ignored_patterns:
-            if pattern in str(file_path):
+            if pattern in file_path:
                 return True
         return False
 
@@ -52,57 +95,105 @@ class ObsidianFileHandler(FileSystemEventHandler):
 
     def on_moved(self, event: FileSystemEvent):
         """Handle file move/rename events."""
-        if not event.is_directory and event.src_path.endswith('.md'):
-            self._process_file_change(event.src_path, "moved")
+        if event.is_directory:
+            return
+
+        # Both ends are filtered here, so the change is forwarded unchecked
+        src_is_note = (event.src_path.endswith('.md')
+                       and not self.should_ignore(event.src_path))
+        dest_is_note = (event.dest_path.endswith('.md')
+                        and not self.should_ignore(event.dest_path))
+
+        if src_is_note and dest_is_note:
+            self._forward(event.src_path, "moved", event.dest_path)
+        elif src_is_note:
+            # Moved out of the vault's notes: treat as a deletion
+            self._forward(event.src_path, "deleted")
+        elif dest_is_note:
+            # Renamed into a note: treat as a new note
+            self._forward(event.dest_path, "created")
 
     def _process_file_change(self, file_path: str, event_type: str):
         """Process a file change event."""
-        try:
-            file_path_obj = Path(file_path)
-
-            # Check if file should be ignored
-            if self.should_ignore(file_path_obj):
-                logger.debug(f"Ignoring {event_type} event for {file_path}")
-                return
-
-            # Prevent duplicate processing
-            if file_path in self.processing_files:
-                logger.debug(f"Already processing {file_path}, skipping")
-                return
+        if self.should_ignore(file_path):
+            logger.debug(f"Ignoring {event_type} event for {file_path}")
+            return
 
-            self.processing_files.add(file_path)
+        self._forward(file_path, event_type)
 
-            # Process the file change
-            self.callback(file_path_obj, event_type)
+    def _forward(self, file_path: str, event_type: str,
+                 dest_path: Optional[str] = None):
+        """Pass an already-filtered change to the callback."""
+        try:
+            if dest_path is None:
+                self.callback(file_path, event_type)
+            else:
+                self.callback(file_path, event_type, dest_path)
 
         except Exception as e:
             logger.error(
                 f"Error processing {event_type} event for {file_path}: {e}")
-        finally:
-            self.processing_files.discard(file_path)
 
 
 class FileWatcherService:
     """Service for watching Obsidian vault files for changes."""
 
+    # Upper bound on debounced events held during large event bursts
+    DEBOUNCE_MAX_ENTRIES = 10_000
+
+    # Event types that wait for a quiet period; the rest dispatch immediately
+    DEBOUNCED_EVENTS = {"created", "modified"}
+
     def __init__(self,
                  vault_path: str,
                  entity_detection_service: EntityDetectionService,
-                 knowledge_graph_service: KnowledgeGraphService):
+                 knowledge_graph_service: KnowledgeGraphService,
+                 clock: Callable[[], float] = time.monotonic):
         """Initialize the file watcher service."""
         self.vault_path = Path(vault_path)
         self.entity_detection_service = entity_detection_service
         self.kg_service = knowledge_graph_service
-        self.observer = Observer()
+        self.observer = self._create_observer()
         self.handler = None
         self.is_watching = False
 
-        # Track file modification times to avoid duplicate processing
-        self.last_modified: Dict[str, float] = {}
-
-        # Debounce timer for file changes
-        self.debounce_timer = None
+        # Debounced events per file as (deadline, event_type). One thread
+        # dispatches each file once no new event arrived for debounce_delay.
+        self.pending_events: Dict[str, Tuple[float, str]] = {}
         self.debounce_delay = 2.0  # seconds
+        # Monotonic time source for debounce deadlines
+        self.clock = clock
+        # (deadline, file_path) min-heap with one entry per pending file; a
+        # later event only moves the deadline in pending_events, and the
+        # entry is pushed back when it surfaces early
+        self._deadlines: List[Tuple[float, str]] = []
+        self._debounce = threading.Condition()
+        self._debounce_thread: Optional[threading.Thread] = None
+        self._debounce_stopped = False
+
+        # Ingestion runs on a worker pool so the observer thread never blocks
+        self._pool = ThreadPoolExecutor(
+            max_workers=Config.FILE_WATCHER_WORKERS,
+            thread_name_prefix="graphrag-ingest")
+        # File -> (latest work, the earlier work it waits for, if any)
+        self._pending: Dict[str, Tuple[Future, Optional[Future]]] = {}
+        self._pending_lock = threading.RLock()
+
+        # Event type -> processing method, resolved once per event
+        self._dispatch: Dict[str, Callable] = {
+            "created": self._process_note_update,
+            "modified": self._process_note_update,
+            "deleted": self._process_note_deletion,
+            "moved": self._process_note_move,
+        }
+
+    def _create_observer(self):
+        """Pick a polling observer for network vaults, native events otherwise."""
+        mode = Config.FILE_WATCHER_POLLING
+        if mode == "true" or (mode == "auto" and is_network_filesystem(self.vault_path)):
+            logger.info(f"Using polling observer for vault: {self.vault_path}")
+            return PollingObserver(timeout=Config.FILE_WATCHER_POLL_INTERVAL)
+        return Observer()
 
     def start_watching(self):
         """Start watching the Obsidian vault for changes."""
@@ -124,8 +215,11 @@ class FileWatcherService:
                 recursive=True
             )
 
-            # Start the observer
+            # Start the observer and the debounce thread
             self.observer.start()
+            self._debounce_thread = threading.Thread(
+                target=self._debounce_loop, name="graphrag-debounce", daemon=True)
+            self._debounce_thread.start()
             self.is_watching = True
 
             logger.info(f"Started watching Obsidian vault: {self.vault_path}")
@@ -142,43 +236,139 @@ class FileWatcherService:
         try:
             self.observer.stop()
             self.observer.join()
+
+            # Dispatch debounced events now rather than dropping them
+            with self._debounce:
+                self._debounce_stopped = True
+                self._debounce.notify()
+            if self._debounce_thread is not None:
+                self._debounce_thread.join()
+            self._dispatch_due(float("inf"))
+
+            self._pool.shutdown(wait=True)
             self.is_watching = False
             logger.info("Stopped watching Obsidian vault")
 
         except Exception as e:
             logger.error(f"Error stopping file watcher: {e}")
 
-    def _handle_file_change(self, file_path: Path, event_type: str):
+    def _handle_file_change(self, file_path: str, event_type: str,
+                            dest_path: Optional[str] = None):
         """Handle a file change event."""
         try:
-            # Debounce rapid file changes
-            current_time = time.time()
-            file_key = str(file_path)
-
-            if file_key in self.last_modified:
-                time_since_last = current_time - self.last_modified[file_key]
-                if time_since_last < self.debounce_delay:
-                    logger.debug(
-                        f"Debouncing {event_type} event for {file_path}")
-                    return
+            handler = self._dispatch.get(event_type)
+            if handler is None:
+                logger.debug(f"Ignoring unknown event type {event_type}")
+                return
+
+            # Wait for edits to settle, unless too many files are waiting
+            if event_type in self.DEBOUNCED_EVENTS and self._schedule(file_path, event_type):
+                return
 
-            self.last_modified[file_key] = current_time
+            # A deletion or move supersedes any update still waiting
+            with self._debounce:
+                self.pending_events.pop(file_path, None)
 
-            # Process the file change based on event type
-            if event_type == "created" or event_type == "modified":
-                self._process_note_update(file_path)
-            elif event_type == "deleted":
-                self._process_note_deletion(file_path)
-            elif event_type == "moved":
-                # Handle as both deletion and creation
-                self._process_note_deletion(file_path)
-                # Note: The new location will trigger a "created" event
+            if dest_path is None:
+                self._submit(file_path, handler, file_path)
+            else:
+                # Key moves on the destination so later edits queue behind it
+                self._submit(dest_path, handler, file_path, dest_path)
 
         except Exception as e:
             logger.error(
                 f"Error handling file change {event_type} for {file_path}: {e}")
 
-    def _process_note_update(self, file_path: Path):
+    def _schedule(self, file_path: str, event_type: str) -> bool:
+        """Debounce an event, returning False when the debounce map is full."""
+        deadline = self.clock() + self.debounce_delay
+        with self._debounce:
+            if (file_path not in self.pending_events
+                    and len(self.pending_events) >= self.DEBOUNCE_MAX_ENTRIES):
+                return False
+
+            rescheduled = file_path in self.pending_events
+            self.pending_events[file_path] = (deadline, event_type)
+            if rescheduled:
+                # Deadlines only move later, so the debounce thread can sleep on
+                logger.debug(f"Debouncing {event_type} event for {file_path}")
+            else:
+                heapq.heappush(self._deadlines, (deadline, file_path))
+                self._debounce.notify()
+        return True
+
+    def _debounce_loop(self):
+        """Dispatch debounced events as their deadlines pass."""
+        while True:
+            with self._debounce:
+                if self._debounce_stopped:
+                    return
+                timeout = None
+                if self._deadlines:
+                    timeout = self._deadlines[0][0] - self.clock()
+                if timeout is None or timeout > 0:
+                    self._debounce.wait(timeout)
+            self._dispatch_due(self.clock())
+
+    def _dispatch_due(self, now: float):
+        """Submit every debounced event whose deadline is at or before now."""
+        due = []
+        with self._debounce:
+            while self._deadlines and self._deadlines[0][0] <= now:
+                _, file_path = heapq.heappop(self._deadlines)
+                entry = self.pending_events.get(file_path)
+                if entry is None:
+                    # Superseded by a deletion or move
+                    continue
+                if entry[0] > now:
+                    # A later event pushed the deadline back
+                    heapq.heappush(self._deadlines, (entry[0], file_path))
+                    continue
+                del self.pending_events[file_path]
+                due.append((file_path, entry[1]))
+
+        for file_path, event_type in due:
+            try:
+                self._submit(file_path, self._dispatch[event_type], file_path)
+            except Exception as e:
+                logger.error(
+                    f"Error dispatching {event_type} event for {file_path}: {e}")
+
+    def _submit(self, file_key: str, fn: Callable, *args) -> Future:
+        """Schedule work for a file on the ingestion pool.
+
+        A newer event for the same file replaces work that has not started
+        yet, and otherwise waits for the running work so the two never race.
+        """
+        with self._pending_lock:
+            previous, after = self._pending.get(file_key, (None, None))
+            if previous is not None and not previous.cancel():
+                after = None if previous.done() else previous
+            # A cancelled replacement hands its wait on to the new work, so
+            # it still queues behind whatever was running before it
+            if after is not None:
+                future = self._pool.submit(self._run_after, after, fn, *args)
+            else:
+                future = self._pool.submit(fn, *args)
+            self._pending[file_key] = (future, after)
+
+        future.add_done_callback(
+            lambda done: self._forget_pending(file_key, done))
+        return future
+
+    @staticmethod
+    def _run_after(previous: Future, fn: Callable, *args):
+        """Run fn once the previous work for the same file has finished."""
+        wait([previous])
+        fn(*args)
+
+    def _forget_pending(self, file_key: str, future: Future):
+        """Drop a finished future unless it was already replaced."""
+        with self._pending_lock:
+            if self._pending.get(file_key, (None,))[0] is future:
+                del self._pending[file_key]
+
+    def _process_note_update(self, file_path: str):
         """Process a note update (create or modify)."""
         try:
             logger.info(f"Processing note update: {file_path}")
@@ -188,6 +378,14 @@ class FileWatcherService:
             if not note:
                 return
 
+            # Unchanged text needs no entity detection or embedding; only
+            # the node's metadata (frontmatter, tags, mtime) is refreshed
+            if (self.kg_service.get_note_content_hash(file_path)
+                    == EmbeddingCache.content_hash(note.content)):
+                self.kg_service.create_note_node(note)
+                logger.info(f"Note content unchanged, refreshed metadata: {file_path}")
+                return
+
             # Detect entities in the note
             detection_result = self.entity_detection_service.detect_entities(
                 note)
@@ -200,18 +398,13 @@ class FileWatcherService:
         except Exception as e:
             logger.error(f"Error processing note update for {file_path}: {e}")
 
-    def _process_note_deletion(self, file_path: Path):
+    def _process_note_deletion(self, file_path: str):
         """Process a note deletion."""
         try:
             logger.info(f"Processing note deletion: {file_path}")
 
             # Remove the note from the knowledge graph
-            self.kg_service.delete_note(str(file_path))
-
-            # Clean up tracking
-            file_key = str(file_path)
-            if file_key in self.last_modified:
-                del self.last_modified[file_key]
+            self.kg_service.delete_note(file_path)
 
             logger.info(f"Successfully processed note deletion: {file_path}")
 
@@ -219,23 +412,42 @@ class FileWatcherService:
             logger.error(
                 f"Error processing note deletion for {file_path}: {e}")
 
-    def _read_note_file(self, file_path: Path) -> Optional[Note]:
+    def _process_note_move(self, src_path: str, dest_path: str):
+        """Process a note move or rename."""
+        try:
+            logger.info(f"Processing note move: {src_path} -> {dest_path}")
+
+            # Re-key the existing node so its entity links and embedding survive
+            self.kg_service.move_note(src_path, dest_path)
+
+            # Refresh title and content from the new location
+            self._process_note_update(dest_path)
+
+        except Exception as e:
+            logger.error(
+                f"Error processing note move {src_path} -> {dest_path}: {e}")
+
+    def _read_note_file(self, file_path: str) -> Optional[Note]:
         """Read and parse an Obsidian note file."""
         try:
-            # Check file size
-            if file_path.stat().st_size > Config.MAX_NOTE_SIZE:
-                logger.warning(f"Note file too large, skipping: {file_path}")
-                return None
+            path = Path(file_path)
 
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Stat and read through one descriptor: one lookup of the path,
+            # and the size check sees the same file that is read
+            with open(path, 'rb') as note_file:
+                stat = os.fstat(note_file.fileno())
+                if stat.st_size > Config.MAX_NOTE_SIZE:
+                    logger.warning(f"Note file too large, skipping: {file_path}")
+                    return None
+
+                # Read file content in one call, bypassing the text I/O layer
+                content = note_file.read().decode('utf-8')
 
             # Parse frontmatter and content
             frontmatter, note_content = self._parse_frontmatter(content)
 
             # Extract title from filename or frontmatter
-            title = frontmatter.get('title', file_path.stem)
+            title = frontmatter.get('title', path.stem)
 
             # Extract tags
             tags = set(frontmatter.get('tags', []))
@@ -245,13 +457,13 @@ class FileWatcherService:
 
             # Create Note object
             note = Note(
-                file_path=str(file_path),
+                file_path=file_path,
                 title=title,
                 content=note_content,
                 frontmatter=frontmatter,
                 tags=tags,
                 links=links,
-                last_modified=datetime.fromtimestamp(file_path.stat().st_mtime)
+                last_modified=datetime.fromtimestamp(stat.st_mtime)
             )
 
             return note
@@ -262,76 +474,39 @@ class FileWatcherService:
 
     def _parse_frontmatter(self, content: str) -> tuple[Dict, str]:
         """Parse YAML frontmatter from note content."""
-        import yaml
-
         frontmatter = {}
         note_content = content
 
         # Check if content starts with frontmatter
         if content.startswith('---'):
-            try:
-                # Find frontmatter boundaries
-                parts = content.split('---', 2)
-                if len(parts) >= 3:
-                    frontmatter_text = parts[1].strip()
-                    note_content = parts[2].strip()
-
-                    # Parse YAML frontmatter
-                    if frontmatter_text:
-                        frontmatter = yaml.safe_load(frontmatter_text) or {}
-
-            except yaml.YAMLError as e:
-                logger.warning(f"Failed to parse frontmatter: {e}")
+            # Find the closing marker without splitting the whole note
+            end = content.find('\n---', 3)
+            if end != -1:
+                frontmatter_text = content[3:end].strip()
+                note_content = content[end + 4:].strip()
+
+                # Parse YAML frontmatter
+                if frontmatter_text:
+                    try:
+                        frontmatter = yaml.load(
+                            frontmatter_text, Loader=YAML_LOADER) or {}
+                    except yaml.YAMLError as e:
+                        logger.warning(f"Failed to parse frontmatter: {e}")
 
         return frontmatter, note_content
 
     def _extract_links(self, content: str) -> Set[str]:
         """Extract Obsidian links from note content."""
-        import re
-
-        links = set()
-
-        # Extract [[internal links]]
-        internal_links = re.findall(r'\[\[([^\]]+)\]\]', content)
-        links.update(internal_links)
-
-        # Extract [external links](url)
-        external_links = re.findall(r'\[([^\]]+)\]\([^)]+\)', content)
-        links.update(external_links)
-
+        links = set(INTERNAL_LINK_PATTERN.findall(content))
+        links.update(EXTERNAL_LINK_PATTERN.findall(content))
         return links
 
     def _update_knowledge_graph(self, note: Note, detection_result):
         """Update the knowledge graph with the note and its entities."""
         try:
-            # Create or update the note node
-            self.kg_service.create_note_node(note)
-
-            # Create entity nodes
-            entity_names = []
-            for entity in detection_result.entities:
-                self.kg_service.create_entity_node(entity)
-                entity_names.append(entity.name)
-
-            # Link note to entities
-            if entity_names:
-                self.kg_service.link_note_to_entities(
-                    note.file_path, entity_names)
-
-            # Create relationships between entities
-            for relationship in detection_result.relationships:
-                # Find entity names by ID
-                source_entity = next(
-                    (e for e in detection_result.entities if e.id == relationship.source_entity_id), None)
-                target_entity = next(
-                    (e for e in detection_result.entities if e.id == relationship.target_entity_id), None)
-
-                if source_entity and target_entity:
-                    self.kg_service.create_relationship(
-                        relationship,
-                        source_entity.name,
-                        target_entity.name
-                    )
+            # Write the note, its entities and relationships in one transaction
+            self.kg_service.write_note_graph(
+                note, detection_result.entities, detection_result.relationships)
 
             # Update embeddings
             self.kg_service.update_note_embeddings(note)
@@ -348,7 +523,8 @@ class FileWatcherService:
         return {
             "is_watching": self.is_watching,
             "vault_path": str(self.vault_path),
-            "files_tracked": len(self.last_modified),
+            "files_tracked": len(self.pending_events),
+            "pending_updates": len(self._pending),
             "observer_status": "running" if self.observer.is_alive() else "stopped"
         }
 
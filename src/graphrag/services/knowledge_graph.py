@@ -1,20 +1,44 @@
 """Knowledge graph service for managing Neo4j operations."""
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
-from neo4j import GraphDatabase
-from neo4j.exceptions import ServiceUnavailable
+from neo4j import GraphDatabase, Record
+from neo4j.exceptions import ClientError, ServiceUnavailable
 from neo4j_graphrag.embeddings.openai import OpenAIEmbeddings
 from neo4j_graphrag.retrievers import HybridCypherRetriever
+from neo4j_graphrag.types import RetrieverResultItem
 
 from ..config import Config
-from ..models import Entity, Note, Relationship, RelationshipType
+from ..models import Entity, EntityType, Note, Relationship, RelationshipType
+from .embedding_cache import EmbeddingCache
+from .openai_http import shared_http_client
+from .vector_index import NoteVectorIndex
 
 logger = logging.getLogger(__name__)
 
+# Stored string for each entity type; str enums hash like their values, so
+# this and the table below accept either a member or its plain string value
+ENTITY_TYPE_VALUES = {entity_type: entity_type.value for entity_type in EntityType}
+
+# Cypher cannot take a relationship type as a parameter, so the upsert is
+# built once per type; the types come from the enum, never from input
+RELATIONSHIP_MERGE_QUERIES = {
+    rel_type: """
+        MATCH (source:Entity {name: $source_name})
+        MATCH (target:Entity {name: $target_name})
+        MERGE (source)-[r:%s]->(target)
+        SET r.confidence = $confidence,
+            r.properties = $properties,
+            r.created_at = $created_at
+    """ % rel_type.value
+    for rel_type in RelationshipType
+}
+
 
 class KnowledgeGraphService:
     """Service for managing the Neo4j knowledge graph."""
@@ -36,179 +60,485 @@ class KnowledgeGraphService:
             raise
 
         # Initialize embeddings
-        self.embedder = OpenAIEmbeddings(model="text-embedding-ada-002")
+        self.embedder = OpenAIEmbeddings(model=Config.EMBEDDING_MODEL,
+                                         max_retries=Config.OPENAI_MAX_RETRIES,
+                                         http_client=shared_http_client())
+        self.embedding_cache = EmbeddingCache(
+            Config.EMBEDDING_CACHE_PATH,
+            model=f"{Config.EMBEDDING_MODEL}/{Config.EMBEDDING_DIMENSIONS}")
+
+        # Pending (file_path, content) pairs waiting to be embedded in one request
+        self._embed_queue: List[Tuple[str, str]] = []
+        self._embed_lock = threading.Lock()
+        self._embed_timer: Optional[threading.Timer] = None
+
+        # Full batches are embedded in the background so callers can keep
+        # writing to Neo4j while the embeddings request is in flight
+        self._embed_pool = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="graphrag-embed")
+        # Flushes also run from the interval timer and from explicit calls,
+        # so they take their batch and write it under one lock; vector
+        # writes for a note then land in the order its updates were queued
+        self._flush_lock = threading.Lock()
+
+        # Optional in-process index answering vector searches without Neo4j;
+        # loaded from the graph on first search
+        self.vector_index: Optional[NoteVectorIndex] = (
+            NoteVectorIndex(Config.EMBEDDING_DIMENSIONS,
+                            dtype=Config.LOCAL_VECTOR_INDEX_DTYPE)
+            if Config.LOCAL_VECTOR_INDEX else None)
+        self._vector_index_loaded = False
+        self._vector_index_lock = threading.Lock()
+
+        # Bumped after every write that can change retrieval results, so
+        # caches of answers can tell when the notes behind them changed
+        self.generation = 0
+
+        # Build the retrieval query once; searches reuse the same text
+        retrieval_query = self._get_retrieval_query()
+        self._local_search_query = """
+            UNWIND $hits AS hit
+            MATCH (node:Note {file_path: hit.file_path})
+            WITH node, hit.score AS score
+        """ + retrieval_query
 
         # Initialize hybrid cypher retriever
         self.retriever = HybridCypherRetriever(
             driver=self.driver,
             vector_index_name=Config.VECTOR_INDEX_NAME,
             fulltext_index_name=Config.FULLTEXT_INDEX_NAME,
-            retrieval_query=self._get_retrieval_query(),
+            retrieval_query=retrieval_query,
             embedder=self.embedder,
+            result_formatter=self._format_search_record,
         )
 
         # Ensure indexes exist
         self._ensure_indexes()
 
     def _get_retrieval_query(self) -> str:
-        """Get the Cypher query for hybrid retrieval."""
+        """Get the Cypher query for hybrid retrieval.
+
+        The hybrid search yields `node` and `score` for each hit; entity and
+        related-note lookups are expanded per hit in separate subqueries.
+        Only the stored summary is returned so hits stay small on the wire,
+        and each hit is projected into a single map column.
+        """
         return """
-        MATCH (note:Note)
-        OPTIONAL MATCH (note)-[:CONTAINS_ENTITY]->(entity:Entity)
-        OPTIONAL MATCH (entity)-[rel:RELATED_TO|MENTIONS|WORKS_FOR|AUTHOR_OF|PART_OF|SIMILAR_TO|COLLABORATES_WITH|LOCATED_IN|DISCUSSES|ATTENDS]->(related_entity:Entity)
-        OPTIONAL MATCH (related_entity)<-[:CONTAINS_ENTITY]-(related_note:Note)
-        
-        RETURN DISTINCT
-            note.title AS note_title,
-            note.content AS note_content,
-            note.file_path AS note_path,
-            collect(DISTINCT entity.name) AS entities,
-            collect(DISTINCT {
+        WITH node AS note, score
+        CALL {
+            WITH note
+            OPTIONAL MATCH (note)-[:CONTAINS_ENTITY]->(entity:Entity)
+            RETURN collect(DISTINCT entity.name) AS entities
+        }
+        CALL {
+            WITH note
+            OPTIONAL MATCH (note)-[:CONTAINS_ENTITY]->(:Entity)-[rel:RELATED_TO|MENTIONS|WORKS_FOR|AUTHOR_OF|PART_OF|SIMILAR_TO|COLLABORATES_WITH|LOCATED_IN|DISCUSSES|ATTENDS]->(related_entity:Entity)
+            OPTIONAL MATCH (related_entity)<-[:CONTAINS_ENTITY]-(related_note:Note)
+            RETURN collect(DISTINCT {
                 name: related_entity.name,
                 type: related_entity.entity_type,
                 relationship: type(rel)
             }) AS related_entities,
             collect(DISTINCT related_note.title) AS related_notes
-        ORDER BY note.last_modified DESC
-        """
+        }
+        RETURN {
+            note_title: note.title,
+            note_content: coalesce(note.summary, left(note.content, %d)),
+            note_path: note.file_path,
+            entities: entities,
+            related_entities: related_entities,
+            related_notes: related_notes,
+            score: score
+        } AS hit
+        ORDER BY score DESC
+        """ % Config.NOTE_SUMMARY_LENGTH
 
     def _ensure_indexes(self):
         """Ensure required indexes exist in Neo4j."""
         with self.driver.session() as session:
             # Create vector index for note content
-            session.run("""
-                CALL db.index.vector.createIfNotExists(
-                    $index_name,
-                    'Note',
-                    'content_embedding',
-                    1536,
-                    'cosine'
-                )
-            """, index_name=Config.VECTOR_INDEX_NAME)
+            session.run(f"""
+                CREATE VECTOR INDEX `{Config.VECTOR_INDEX_NAME}` IF NOT EXISTS
+                FOR (n:Note) ON (n.content_embedding)
+                OPTIONS {{indexConfig: {{
+                    `vector.dimensions`: $dimensions,
+                    `vector.similarity_function`: 'cosine'
+                }}}}
+            """, dimensions=Config.EMBEDDING_DIMENSIONS)
 
             # Create fulltext index for note content
-            session.run("""
-                CALL db.index.fulltext.createIfNotExists(
-                    $index_name,
-                    ['Note'],
-                    ['title', 'content']
-                )
-            """, index_name=Config.FULLTEXT_INDEX_NAME)
-
-            # Create constraints for unique properties
+            session.run(f"""
+                CREATE FULLTEXT INDEX `{Config.FULLTEXT_INDEX_NAME}` IF NOT EXISTS
+                FOR (n:Note) ON EACH [n.title, n.content]
+            """)
+
+            # Create constraints for unique properties (these also back
+            # the file_path and name lookups with a range index)
             session.run(
                 "CREATE CONSTRAINT note_file_path_unique IF NOT EXISTS FOR (n:Note) REQUIRE n.file_path IS UNIQUE")
             session.run(
                 "CREATE CONSTRAINT entity_name_unique IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE")
 
+            # Support ORDER BY last_modified in related-note lookups
+            session.run(
+                "CREATE INDEX note_last_modified IF NOT EXISTS FOR (n:Note) ON (n.last_modified)")
+
     def create_note_node(self, note: Note) -> str:
         """Create a Note node in Neo4j."""
         with self.driver.session() as session:
-            result = session.run("""
-                MERGE (n:Note {file_path: $file_path})
-                SET n.title = $title,
-                    n.content = $content,
-                    n.frontmatter = $frontmatter,
-                    n.tags = $tags,
-                    n.links = $links,
-                    n.last_modified = $last_modified,
-                    n.updated_at = $updated_at
-                RETURN n.file_path
-            """,
-                                 file_path=note.file_path,
-                                 title=note.title,
-                                 content=note.content,
-                                 frontmatter=note.frontmatter,
-                                 tags=list(note.tags),
-                                 links=list(note.links),
-                                 last_modified=note.last_modified,
-                                 updated_at=note.updated_at
-                                 )
-            return result.single()["n.file_path"]
+            file_path = self._merge_note(session, note).single()["n.file_path"]
+        self.generation += 1
+        return file_path
+
+    @classmethod
+    def _merge_note(cls, runner, note: Note):
+        """Run the Note upsert on a session or transaction."""
+        return runner.run("""
+            MERGE (n:Note {file_path: $file_path})
+            SET n.title = $title,
+                n.content = $content,
+                n.summary = $summary,
+                n.frontmatter = $frontmatter,
+                n.tags = $tags,
+                n.links = $links,
+                n.last_modified = $last_modified,
+                n.updated_at = $updated_at
+            RETURN n.file_path
+        """, **cls._note_properties(note))
+
+    def bulk_upsert_notes(self, notes: List[Note]) -> int:
+        """Create or update many Note nodes with batched UNWIND writes.
+
+        Intended for backfills; each note's properties are serialized once
+        and sent in batches of NOTE_UPSERT_BATCH_SIZE rows per query.
+        """
+        rows = [self._note_properties(note) for note in notes]
+        batch_size = Config.NOTE_UPSERT_BATCH_SIZE
+
+        with self.driver.session() as session:
+            for i in range(0, len(rows), batch_size):
+                session.run("""
+                    UNWIND $rows AS row
+                    MERGE (n:Note {file_path: row.file_path})
+                    SET n.title = row.title,
+                        n.content = row.content,
+                        n.summary = row.summary,
+                        n.frontmatter = row.frontmatter,
+                        n.tags = row.tags,
+                        n.links = row.links,
+                        n.last_modified = row.last_modified,
+                        n.updated_at = row.updated_at
+                """, rows=rows[i:i + batch_size])
+                self.generation += 1
+
+        return len(rows)
+
+    @staticmethod
+    def _note_properties(note: Note) -> Dict:
+        """Build the Cypher parameters describing a Note node."""
+        return {
+            "file_path": note.file_path,
+            "title": note.title,
+            "content": note.content,
+            "summary": note.content[:Config.NOTE_SUMMARY_LENGTH],
+            "frontmatter": note.frontmatter,
+            "tags": list(note.tags),
+            "links": list(note.links),
+            "last_modified": note.last_modified,
+            "updated_at": note.updated_at,
+        }
 
     def create_entity_node(self, entity: Entity) -> str:
         """Create an Entity node in Neo4j."""
         with self.driver.session() as session:
-            result = session.run("""
-                MERGE (e:Entity {name: $name})
-                SET e.entity_type = $entity_type,
-                    e.confidence = $confidence,
-                    e.aliases = $aliases,
-                    e.properties = $properties,
-                    e.updated_at = $updated_at
-                RETURN e.name
-            """,
-                                 name=entity.name,
-                                 entity_type=entity.entity_type.value,
-                                 confidence=entity.confidence,
-                                 aliases=list(entity.aliases),
-                                 properties=entity.properties,
-                                 updated_at=entity.updated_at
-                                 )
-            return result.single()["e.name"]
+            return self._merge_entity(session, entity).single()["e.name"]
+
+    @staticmethod
+    def _merge_entity(runner, entity: Entity):
+        """Run the Entity upsert on a session or transaction."""
+        return runner.run("""
+            MERGE (e:Entity {name: $name})
+            SET e.entity_type = $entity_type,
+                e.confidence = $confidence,
+                e.aliases = $aliases,
+                e.properties = $properties,
+                e.updated_at = $updated_at
+            RETURN e.name
+        """,
+                          name=entity.name,
+                          entity_type=ENTITY_TYPE_VALUES[entity.entity_type],
+                          confidence=entity.confidence,
+                          aliases=list(entity.aliases),
+                          properties=entity.properties,
+                          updated_at=entity.updated_at
+                          )
 
     def create_relationship(self, relationship: Relationship, source_name: str, target_name: str):
         """Create a relationship between entities."""
         with self.driver.session() as session:
-            session.run("""
-                MATCH (source:Entity {name: $source_name})
-                MATCH (target:Entity {name: $target_name})
-                MERGE (source)-[r:$relationship_type]->(target)
-                SET r.confidence = $confidence,
-                    r.properties = $properties,
-                    r.created_at = $created_at
-            """,
-                        source_name=source_name,
-                        target_name=target_name,
-                        relationship_type=relationship.relationship_type.value,
-                        confidence=relationship.confidence,
-                        properties=relationship.properties,
-                        created_at=relationship.created_at
-                        )
+            self._merge_relationship(session, relationship, source_name, target_name)
+
+    @staticmethod
+    def _merge_relationship(runner, relationship: Relationship,
+                            source_name: str, target_name: str):
+        """Run the relationship upsert on a session or transaction."""
+        return runner.run(RELATIONSHIP_MERGE_QUERIES[relationship.relationship_type],
+                          source_name=source_name,
+                          target_name=target_name,
+                          confidence=relationship.confidence,
+                          properties=relationship.properties,
+                          created_at=relationship.created_at
+                          )
 
     def link_note_to_entities(self, note_path: str, entity_names: List[str]):
-        """Link a note to its contained entities."""
+        """Link a note to its contained entities in a single query."""
+        if not entity_names:
+            return
+
         with self.driver.session() as session:
-            for entity_name in entity_names:
-                session.run("""
-                    MATCH (note:Note {file_path: $note_path})
-                    MATCH (entity:Entity {name: $entity_name})
-                    MERGE (note)-[:CONTAINS_ENTITY]->(entity)
-                """,
-                            note_path=note_path,
-                            entity_name=entity_name
-                            )
+            self._link_note_to_entities(session, note_path, entity_names)
+
+    @staticmethod
+    def _link_note_to_entities(runner, note_path: str, entity_names: List[str]):
+        """Run the note-to-entities link on a session or transaction."""
+        return runner.run("""
+            MATCH (note:Note {file_path: $note_path})
+            UNWIND $entity_names AS entity_name
+            MATCH (entity:Entity {name: entity_name})
+            MERGE (note)-[:CONTAINS_ENTITY]->(entity)
+        """,
+                          note_path=note_path,
+                          entity_names=list(entity_names)
+                          )
+
+    def write_note_graph(self, note: Note, entities: List[Entity],
+                         relationships: List[Relationship], create_note: bool = True):
+        """Write a note, its entities and their relationships in one transaction."""
+        with self.driver.session() as session:
+            session.execute_write(
+                self._write_note_graph, note, entities, relationships, create_note)
+        self.generation += 1
+
+    def _write_note_graph(self, tx, note: Note, entities: List[Entity],
+                          relationships: List[Relationship], create_note: bool):
+        """Transaction function for write_note_graph; safe to retry."""
+        if create_note:
+            self._merge_note(tx, note)
+
+        for entity in entities:
+            self._merge_entity(tx, entity)
+        if entities:
+            self._link_note_to_entities(
+                tx, note.file_path, [entity.name for entity in entities])
+
+        # Relationships refer to entities by id; skip any whose ends are unknown
+        names = {entity.id: entity.name for entity in entities}
+        for relationship in relationships:
+            source_name = names.get(relationship.source_entity_id)
+            target_name = names.get(relationship.target_entity_id)
+            if source_name and target_name:
+                self._merge_relationship(tx, relationship, source_name, target_name)
 
     def update_note_embeddings(self, note: Note):
-        """Update vector embeddings for a note."""
-        try:
-            # Generate embedding for note content
-            embedding = self.embedder.embed_query(note.content)
+        """Queue a note for embedding.
 
+        Notes are coalesced and embedded together once the batch is full or
+        the flush interval elapses, so a burst of updates costs one request.
+        """
+        with self._embed_lock:
+            self._embed_queue.append((note.file_path, note.content))
+            batch_full = len(self._embed_queue) >= Config.EMBEDDING_BATCH_SIZE
+            if not batch_full and self._embed_timer is None:
+                self._embed_timer = threading.Timer(
+                    Config.EMBEDDING_FLUSH_INTERVAL, self.flush_note_embeddings)
+                self._embed_timer.daemon = True
+                self._embed_timer.start()
+
+        if batch_full:
+            self._embed_pool.submit(self.flush_note_embeddings)
+
+    def flush_note_embeddings(self):
+        """Embed all queued notes with a single embeddings request."""
+        with self._flush_lock:
+            self._flush_note_embeddings()
+
+    def _flush_note_embeddings(self):
+        """Embed and store the queued notes; the caller holds the flush lock."""
+        with self._embed_lock:
+            batch, self._embed_queue = self._embed_queue, []
+            if self._embed_timer is not None:
+                self._embed_timer.cancel()
+                self._embed_timer = None
+
+        if not batch:
+            return
+
+        try:
+            embeddings = self._embed_with_cache([content for _, content in batch])
+
+            # Notes the API rejected keep their previous embedding
+            rows = [
+                {"file_path": file_path, "embedding": embedding,
+                 "content_hash": EmbeddingCache.content_hash(content)}
+                for (file_path, content), embedding in zip(batch, embeddings)
+                if embedding is not None
+            ]
+            if len(rows) < len(batch):
+                failed = [file_path for (file_path, _), embedding
+                          in zip(batch, embeddings) if embedding is None]
+                logger.warning(f"Could not embed {len(failed)} notes: {failed}")
+            if not rows:
+                return
+
+            # setNodeVectorProperty stores a float32 array; a plain SET
+            # would store the list as doubles at twice the size. The hash
+            # is written with the embedding, so content whose embedding
+            # failed is never mistaken for unchanged.
             with self.driver.session() as session:
                 session.run("""
-                    MATCH (n:Note {file_path: $file_path})
-                    SET n.content_embedding = $embedding
-                """,
-                            file_path=note.file_path,
-                            embedding=embedding
-                            )
+                    UNWIND $rows AS row
+                    MATCH (n:Note {file_path: row.file_path})
+                    SET n.content_hash = row.content_hash
+                    WITH n, row
+                    CALL db.create.setNodeVectorProperty(n, 'content_embedding', row.embedding)
+                """, rows=rows)
+
+            if self.vector_index is not None:
+                self.vector_index.upsert_many(
+                    {row["file_path"]: row["embedding"] for row in rows})
+            self.generation += 1
         except Exception as e:
             logger.warning(
-                f"Failed to update embeddings for note {note.file_path}: {e}")
+                f"Failed to update embeddings for {len(batch)} notes: {e}")
+
+    def _embed_with_cache(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed texts, reusing cached vectors for content seen before.
+
+        Texts that could not be embedded get None in their place.
+        """
+        hashes = [EmbeddingCache.content_hash(text) for text in texts]
+        vectors = self.embedding_cache.get_many(hashes)
+
+        misses = [(h, text) for h, text in dict(zip(hashes, texts)).items()
+                  if h not in vectors]
+        batch_size = Config.EMBEDDING_BATCH_SIZE
+        for start in range(0, len(misses), batch_size):
+            new_vectors = self._embed_batch(dict(misses[start:start + batch_size]))
+            self.embedding_cache.put_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors.get(h) for h in hashes]
+
+    def _embed_batch(self, texts: Dict[str, str]) -> Dict[str, List[float]]:
+        """Embed one request's worth of texts keyed by content hash.
 
-    def search_notes(self, query: str, top_k: int = None) -> List[Dict]:
+        If the request fails, each text is retried on its own so one
+        oversized or invalid note does not drop the rest of the batch.
+        """
+        try:
+            return dict(zip(texts, self._embed_texts(list(texts.values()))))
+        except Exception as e:
+            if len(texts) == 1:
+                logger.warning(f"Embedding request failed: {e}")
+                return {}
+            logger.warning(
+                f"Embedding request for {len(texts)} notes failed, "
+                f"retrying them one at a time: {e}")
+
+        vectors = {}
+        for content_hash, text in texts.items():
+            try:
+                vectors[content_hash] = self._embed_texts([text])[0]
+            except Exception as e:
+                logger.warning(f"Embedding request failed: {e}")
+        return vectors
+
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings, EMBEDDING_BATCH_SIZE texts per API request."""
+        vectors = []
+        batch_size = Config.EMBEDDING_BATCH_SIZE
+        for start in range(0, len(texts), batch_size):
+            response = self.embedder.client.embeddings.create(
+                input=texts[start:start + batch_size], model=self.embedder.model)
+            vectors.extend(item.embedding for item in response.data)
+        return vectors
+
+    @staticmethod
+    def _format_search_record(record: Record) -> RetrieverResultItem:
+        """Return the hit map projected by the retrieval query."""
+        return RetrieverResultItem(content=record["hit"])
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query string with the note embedding model."""
+        return self.embedder.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several query strings in one API request."""
+        return self._embed_texts(texts)
+
+    def search_notes(self, query: str, top_k: int = None,
+                     query_vector: Optional[List[float]] = None) -> List[Dict]:
         """Search notes using hybrid retrieval."""
         if top_k is None:
             top_k = Config.CONTEXT_WINDOW_SIZE
 
         try:
-            result = self.retriever.search(query_text=query, top_k=top_k)
+            if self.vector_index is not None:
+                return self._search_vector_index(query, top_k, query_vector)
+
+            result = self.retriever.search(
+                query_text=query, query_vector=query_vector, top_k=top_k)
             return result.items
         except Exception as e:
             logger.error(f"Search failed: {e}")
             return []
 
+    def _search_vector_index(self, query: str, top_k: int,
+                             query_vector: Optional[List[float]]) -> List[RetrieverResultItem]:
+        """Search the in-process index and expand only the hits in Neo4j."""
+        self._ensure_vector_index_loaded()
+
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+        hits = self.vector_index.search(query_vector, top_k)
+        if not hits:
+            return []
+
+        with self.driver.session() as session:
+            result = session.run(self._local_search_query, hits=[
+                {"file_path": file_path, "score": score}
+                for file_path, score in hits
+            ])
+            return [self._format_search_record(record) for record in result]
+
+    def _ensure_vector_index_loaded(self):
+        """Pull every stored note embedding into the in-process index once."""
+        with self._vector_index_lock:
+            if self._vector_index_loaded:
+                return
+
+            with self.driver.session() as session:
+                result = session.run("""
+                    MATCH (n:Note)
+                    WHERE n.content_embedding IS NOT NULL
+                    RETURN n.file_path AS file_path, n.content_embedding AS embedding
+                """)
+                self.vector_index.load(
+                    (record["file_path"], record["embedding"]) for record in result)
+
+            self._vector_index_loaded = True
+            logger.info(
+                f"Loaded {len(self.vector_index)} note embeddings into the local index")
+
+    def get_note_content_hash(self, file_path: str) -> Optional[str]:
+        """Get the hash of the note content that was last embedded, if any."""
+        with self.driver.session() as session:
+            record = session.run("""
+                MATCH (n:Note {file_path: $file_path})
+                RETURN n.content_hash AS content_hash
+            """, file_path=file_path).single()
+            return record["content_hash"] if record else None
+
     def get_note_by_path(self, file_path: str) -> Optional[Dict]:
         """Get a note by its file path."""
         with self.driver.session() as session:
@@ -260,30 +590,64 @@ class KnowledgeGraphService:
                 DELETE r, n
             """, file_path=file_path)
 
+        if self.vector_index is not None:
+            self.vector_index.remove(file_path)
+        self.generation += 1
+
+    def move_note(self, old_path: str, new_path: str):
+        """Move a note to a new file path, keeping its relationships."""
+        with self.driver.session() as session:
+            session.run("""
+                MATCH (n:Note {file_path: $old_path})
+                OPTIONAL MATCH (existing:Note {file_path: $new_path})
+                WHERE existing <> n
+                DETACH DELETE existing
+                WITH n
+                SET n.file_path = $new_path
+            """, old_path=old_path, new_path=new_path)
+
+        if self.vector_index is not None:
+            self.vector_index.rename(old_path, new_path)
+        self.generation += 1
+
     def get_graph_stats(self) -> Dict:
         """Get statistics about the knowledge graph."""
         with self.driver.session() as session:
-            stats = {}
-
-            # Count nodes
-            result = session.run(
-                "MATCH (n) RETURN labels(n) as labels, count(n) as count")
-            for record in result:
-                labels = record["labels"]
-                if labels:
-                    label = labels[0]
-                    stats[f"{label}_count"] = record["count"]
-
-            # Count relationships
-            result = session.run(
-                "MATCH ()-[r]->() RETURN type(r) as type, count(r) as count")
-            for record in result:
-                rel_type = record["type"]
-                stats[f"{rel_type}_count"] = record["count"]
+            try:
+                # Read counts from the database's count store via APOC
+                record = session.run("""
+                    CALL apoc.meta.stats() YIELD labels, relTypesCount
+                    RETURN labels, relTypesCount
+                """).single()
+            except ClientError:
+                # APOC is not installed; count by scanning instead
+                return self._scan_graph_stats(session)
 
+            stats = {}
+            for label, count in record["labels"].items():
+                stats[f"{label}_count"] = count
+            for rel_type, count in record["relTypesCount"].items():
+                stats[f"{rel_type}_count"] = count
             return stats
 
+    def _scan_graph_stats(self, session) -> Dict:
+        """Count nodes and relationships with full graph scans in one query."""
+        result = session.run("""
+            CALL {
+                MATCH (n) WHERE size(labels(n)) > 0
+                RETURN labels(n)[0] AS name, count(n) AS count
+                UNION ALL
+                MATCH ()-[r]->()
+                RETURN type(r) AS name, count(r) AS count
+            }
+            RETURN name, count
+        """)
+        return {f"{record['name']}_count": record["count"] for record in result}
+
     def close(self):
         """Close the Neo4j driver connection."""
+        self._embed_pool.shutdown(wait=True)
+        self.flush_note_embeddings()
+        self.embedding_cache.close()
         if self.driver:
             self.driver.close()
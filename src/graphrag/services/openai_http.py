@@ -0,0 +1,33 @@
+"""Pooled HTTP clients shared by the services' OpenAI clients."""
+
+from functools import lru_cache
+
+from openai import (DEFAULT_CONNECTION_LIMITS, DefaultAsyncHttpxClient,
+                    DefaultHttpxClient, Timeout)
+
+from ..config import Config
+
+
+def http_limits():
+    """Connection pool limits for OpenAI HTTP clients."""
+    # Built from the type of the SDK's own default so it always matches the
+    # HTTP library the installed openai package uses
+    return type(DEFAULT_CONNECTION_LIMITS)(
+        max_connections=Config.OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.OPENAI_MAX_CONNECTIONS // 2)
+
+
+def http_timeout() -> Timeout:
+    """Request timeouts for OpenAI HTTP clients."""
+    return Timeout(Config.OPENAI_TIMEOUT, connect=2.0)
+
+
+@lru_cache(maxsize=None)
+def shared_http_client() -> DefaultHttpxClient:
+    """Process-wide pooled HTTP client so warm connections are reused."""
+    return DefaultHttpxClient(limits=http_limits(), timeout=http_timeout())
+
+
+def async_http_client() -> DefaultAsyncHttpxClient:
+    """New pooled async HTTP client; async connections belong to one event loop."""
+    return DefaultAsyncHttpxClient(limits=http_limits(), timeout=http_timeout())
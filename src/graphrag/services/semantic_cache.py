@@ -0,0 +1,129 @@
+"""Semantic cache of query results keyed by question embedding similarity."""
+
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..config import Config
+from ..models import QueryResult
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """In-memory cache returning earlier answers for near-identical questions."""
+
+    def __init__(self,
+                 threshold: Optional[float] = None,
+                 ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None):
+        """Initialize the cache, defaulting to the configured limits."""
+        self.threshold = Config.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl = Config.SEMANTIC_CACHE_TTL if ttl is None else ttl
+        self.max_entries = Config.SEMANTIC_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+
+        # Unit-normalized question embeddings, one row per entry, oldest first
+        self._vectors: Optional[np.ndarray] = None
+        # (created_at, context_size, result) aligned with the rows of _vectors
+        self._entries: List[Tuple[float, int, QueryResult]] = []
+        self._lock = threading.Lock()
+        # Graph generation the cached answers were generated from
+        self._generation: Optional[int] = None
+
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, embedding: List[float], context_size: int,
+               generation: Optional[int] = None) -> Optional[QueryResult]:
+        """Return a cached result for a similar question, if one exists.
+
+        A generation different from the cached answers' clears the cache.
+        """
+        query = self._normalize(embedding)
+
+        with self._lock:
+            if generation != self._generation:
+                self._vectors = None
+                self._entries = []
+                self._generation = generation
+            self._expire(time.monotonic())
+
+            result = None
+            if self._entries:
+                similarities = self._vectors @ query
+                for index in np.argsort(similarities)[::-1]:
+                    if similarities[index] < self.threshold:
+                        break
+                    if self._entries[index][1] == context_size:
+                        result = self._entries[index][2]
+                        break
+
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        logger.debug(
+            f"Semantic cache {'hit' if result else 'miss'} "
+            f"(hits={self.hits}, misses={self.misses})")
+        return result
+
+    def add(self, embedding: List[float], context_size: int, result: QueryResult,
+            generation: Optional[int] = None):
+        """Store a result under its question embedding.
+
+        Results answered from an older graph generation are not stored.
+        """
+        if self.max_entries <= 0:
+            return
+
+        vector = self._normalize(embedding)[np.newaxis, :]
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._expire(time.monotonic())
+
+            if self._vectors is None or not self._entries:
+                self._vectors = vector
+            else:
+                self._vectors = np.vstack([self._vectors, vector])
+            self._entries.append((time.monotonic(), context_size, result))
+
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._drop_oldest(overflow)
+
+    def clear(self):
+        """Remove every cached result."""
+        with self._lock:
+            self._vectors = None
+            self._entries = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float):
+        """Drop entries older than the TTL."""
+        expired = 0
+        for created_at, _, _ in self._entries:
+            if now - created_at < self.ttl:
+                break
+            expired += 1
+        if expired:
+            self._drop_oldest(expired)
+
+    def _drop_oldest(self, count: int):
+        """Drop the oldest count entries."""
+        self._entries = self._entries[count:]
+        self._vectors = self._vectors[count:] if self._entries else None
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
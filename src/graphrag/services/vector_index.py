@@ -0,0 +1,130 @@
+"""In-process vector index over note embeddings."""
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NoteVectorIndex:
+    """Exact cosine search over note embeddings held in memory."""
+
+    # Rows converted to float32 at a time when scoring float16 storage
+    SCORE_CHUNK_ROWS = 4096
+
+    def __init__(self, dimensions: int, capacity: int = 1024, dtype=np.float32):
+        """Initialize an empty index for vectors of the given size."""
+        self.dimensions = dimensions
+        self.dtype = np.dtype(dtype)
+        self._lock = threading.Lock()
+
+        # Unit-normalized vectors in rows [0, count); row i belongs to _paths[i]
+        self._vectors = np.zeros((capacity, dimensions), dtype=self.dtype)
+        self._paths: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __contains__(self, file_path: str) -> bool:
+        return file_path in self._rows
+
+    def load(self, rows: Iterable[Tuple[str, List[float]]]):
+        """Replace the index contents with the given (file_path, vector) rows."""
+        rows = list(rows)
+        with self._lock:
+            self._vectors = np.zeros(
+                (max(len(rows), 1024), self.dimensions), dtype=self.dtype)
+            self._paths = []
+            self._rows = {}
+            for file_path, vector in rows:
+                self._upsert(file_path, vector)
+
+    def upsert_many(self, vectors: Dict[str, List[float]]):
+        """Add or replace the vectors for several notes."""
+        with self._lock:
+            for file_path, vector in vectors.items():
+                self._upsert(file_path, vector)
+
+    def remove(self, file_path: str):
+        """Remove a note from the index, if present."""
+        with self._lock:
+            row = self._rows.pop(file_path, None)
+            if row is None:
+                return
+
+            # Move the last row into the gap to keep rows contiguous
+            last = len(self._paths) - 1
+            last_path = self._paths.pop()
+            if row != last:
+                self._vectors[row] = self._vectors[last]
+                self._paths[row] = last_path
+                self._rows[last_path] = row
+
+    def rename(self, old_path: str, new_path: str):
+        """Re-key a note after it moves, replacing any note at the new path."""
+        self.remove(new_path)
+        with self._lock:
+            row = self._rows.pop(old_path, None)
+            if row is not None:
+                self._paths[row] = new_path
+                self._rows[new_path] = row
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[str, float]]:
+        """Return up to k (file_path, similarity) pairs, most similar first."""
+        query = self._normalize(vector)
+
+        with self._lock:
+            count = len(self._paths)
+            if count == 0 or k <= 0:
+                return []
+
+            similarities = self._score(count, query)
+            if k < count:
+                top = np.argpartition(similarities, -k)[-k:]
+            else:
+                top = np.arange(count)
+            top = top[np.argsort(similarities[top])[::-1]]
+
+            return [(self._paths[i], float(similarities[i])) for i in top]
+
+    def _score(self, count: int, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the query against the first count rows."""
+        if self.dtype == np.float32:
+            return self._vectors[:count] @ query
+
+        # numpy has no fast half-precision matmul, so widen a chunk at a time
+        similarities = np.empty(count, dtype=np.float32)
+        for start in range(0, count, self.SCORE_CHUNK_ROWS):
+            stop = min(start + self.SCORE_CHUNK_ROWS, count)
+            similarities[start:stop] = (
+                self._vectors[start:stop].astype(np.float32) @ query)
+        return similarities
+
+    def _upsert(self, file_path: str, vector: List[float]):
+        """Add or replace one vector; the caller holds the lock."""
+        row = self._rows.get(file_path)
+        if row is None:
+            row = len(self._paths)
+            if row == len(self._vectors):
+                self._grow()
+            self._paths.append(file_path)
+            self._rows[file_path] = row
+        self._vectors[row] = self._normalize(vector)
+
+    def _grow(self):
+        """Double the capacity of the vector matrix."""
+        grown = np.zeros(
+            (max(len(self._vectors) * 2, 1024), self.dimensions), dtype=self.dtype)
+        grown[:len(self._vectors)] = self._vectors
+        self._vectors = grown
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        """Convert a vector to a unit-length float32 array."""
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
@@ -1,36 +1,32 @@
 """Pytest configuration and common fixtures."""
 
-import os
 import pytest
-from unittest.mock import Mock, patch
+from types import SimpleNamespace
+from unittest.mock import Mock
 from pathlib import Path
 
-from graphrag.config import Config
-from graphrag.models import Entity, Note, Relationship, EntityType, RelationshipType
+from graphrag.models import (Entity, Note, QueryResult, Relationship, EntityType,
+                             RelationshipType)
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def mock_config():
-    """Mock configuration for testing."""
-    with patch.dict(os.environ, {
-        'NEO4J_URI': 'bolt://localhost:7687',
-        'NEO4J_USER': 'neo4j',
-        'NEO4J_PASSWORD': 'password',
-        'OPENAI_API_KEY': 'test-key',
-        'OPENAI_ORG_ID': 'test-org',
-        'OBSIDIAN_VAULT_PATH': '/tmp/test-vault',
-        'NEO4J_DATABASE': 'neo4j',
-        'NEO4J_INDEX_NAME': 'test-index',
-        'NEO4J_EMBEDDING_INDEX_NAME': 'test-embedding-index',
-        'OPENAI_EMBEDDING_MODEL': 'text-embedding-ada-002',
-        'OPENAI_ENTITY_DETECTION_MODEL': 'gpt-4o-mini',
-        'OPENAI_QUERY_MODEL': 'gpt-4o',
-        'GRAPH_RAG_CONTEXT_WINDOW': '20',
-        'FILE_WATCHER_DEBOUNCE_SECONDS': '1',
-        'FILE_WATCHER_MAX_NOTE_SIZE_MB': '10',
-        'FILE_WATCHER_BATCH_SIZE': '50'
-    }):
-        return Config()
+    """Plain configuration namespace for testing."""
+    return SimpleNamespace(
+        neo4j_uri="bolt://localhost:7687",
+        neo4j_user="neo4j",
+        neo4j_password="password",
+        neo4j_database="neo4j",
+        neo4j_index_name="test-index",
+        neo4j_embedding_index_name="test-embedding-index",
+        openai_api_key="test-key",
+        openai_org_id="test-org",
+        openai_embedding_model="text-embedding-ada-002",
+        openai_entity_detection_model="gpt-4o-mini",
+        openai_query_model="gpt-4o",
+        obsidian_vault_path="/tmp/test-vault",
+        graph_rag_context_window=20,
+    )
 
 
 @pytest.fixture
@@ -75,29 +71,77 @@ def sample_relationship():
     )
 
 
-@pytest.fixture
-def mock_openai_client():
-    """Mock OpenAI client for testing."""
-    mock_client = Mock()
-    mock_client.embeddings.create.return_value.data[0].embedding = [0.1] * 1536
-    mock_client.chat.completions.create.return_value.choices[0].message.content = '{"entities": []}'
-    return mock_client
-
-
-@pytest.fixture
-def mock_neo4j_driver():
-    """Mock Neo4j driver for testing."""
-    mock_driver = Mock()
-    mock_session = Mock()
-    mock_driver.session.return_value.__enter__.return_value = mock_session
-    mock_driver.session.return_value.__exit__.return_value = None
-    return mock_driver
-
-
 @pytest.fixture
 def temp_vault_path(tmp_path):
     """Temporary vault path for testing."""
     vault_path = tmp_path / "test-vault"
     vault_path.mkdir()
     (vault_path / "⭕Meta").mkdir()
-    return vault_path 
\ No newline at end of file
+    return vault_path 
+
+
+@pytest.fixture(scope="session")
+def vault_path(tmp_path_factory):
+    """Vault path unique to this session (and to each xdist worker)."""
+    return str(tmp_path_factory.mktemp("vault"))
+
+
+class FakeEntityDetectionService:
+    """EntityDetectionService stand-in with each method a plain Mock."""
+
+    def __init__(self):
+        self.detect_entities = Mock()
+
+
+class FakeKnowledgeGraphService:
+    """KnowledgeGraphService stand-in with each method a plain Mock."""
+
+    def __init__(self):
+        self.get_graph_stats = Mock()
+        self.bulk_upsert_notes = Mock()
+        self.update_note_embeddings = Mock()
+        self.flush_note_embeddings = Mock()
+        self.create_note_node = Mock()
+        self.create_entity_node = Mock()
+        self.create_relationship = Mock()
+        self.link_note_to_entities = Mock()
+        self.write_note_graph = Mock()
+        self.close = Mock()
+
+
+def _stream_answer(question, *args, **kwargs):
+    """Stream a canned answer the way QueryService.chat_query_stream does."""
+    answer = f"Answer to {question}"
+    return iter([answer, QueryResult(answer=answer, context_notes=[],
+                                     citations=[], confidence=0.8)])
+
+
+class FakeQueryService:
+    """QueryService stand-in with each method a plain Mock."""
+
+    def __init__(self):
+        self.query = Mock()
+        self.chat_query_stream = Mock(side_effect=_stream_answer)
+        self.get_similar_entities = Mock()
+        self.get_topic_summary = Mock()
+
+
+class FakeFileWatcherService:
+    """FileWatcherService stand-in with each method a plain Mock."""
+
+    def __init__(self):
+        self.start_watching = Mock()
+        self.stop_watching = Mock()
+
+
+@pytest.fixture(scope="session")
+def make_fake_services():
+    """Factory for fresh fakes of the services ObsidianGraphRAG builds."""
+    def _make():
+        return {
+            "EntityDetectionService": FakeEntityDetectionService(),
+            "KnowledgeGraphService": FakeKnowledgeGraphService(),
+            "QueryService": FakeQueryService(),
+            "FileWatcherService": FakeFileWatcherService(),
+        }
+    return _make
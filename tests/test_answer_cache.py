@@ -0,0 +1,70 @@
+"""Tests for the AnswerCache."""
+
+from unittest.mock import patch
+
+import pytest
+
+from graphrag.models import Note, QueryResult
+from graphrag.services.answer_cache import AnswerCache
+
+
+def make_result(answer: str) -> QueryResult:
+    """Build a QueryResult citing one note."""
+    note = Note(title="AI", file_path="ai.md", content="About AI", tags={"ml"})
+    return QueryResult(answer=answer, context_notes=[note],
+                       citations=["AI (ai.md)"], confidence=0.8)
+
+
+class TestAnswerCache:
+    """Test cases for AnswerCache."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Create an AnswerCache in a temporary directory."""
+        cache = AnswerCache(str(tmp_path / "cache" / "answers.sqlite3"), ttl=60)
+        yield cache
+        cache.close()
+
+    def test_key_ignores_note_order(self):
+        """Test that the same notes in a different order share a key."""
+        a = Note(title="A", file_path="a.md", content="a")
+        b = Note(title="B", file_path="b.md", content="b")
+
+        assert AnswerCache.key("q", [a, b]) == AnswerCache.key("q", [b, a])
+
+    def test_key_changes_with_question_and_content(self):
+        """Test that edited notes or other questions miss the cache."""
+        note = Note(title="A", file_path="a.md", content="a")
+        edited = Note(title="A", file_path="a.md", content="a, edited")
+
+        assert AnswerCache.key("q", [note]) != AnswerCache.key("q", [edited])
+        assert AnswerCache.key("q", [note]) != AnswerCache.key("other", [note])
+
+    def test_put_and_get_round_trip(self, cache):
+        """Test that stored results are returned intact."""
+        result = make_result("cached")
+        cache.put("k", result)
+
+        cached = cache.get("k")
+        assert cached.answer == "cached"
+        assert cached.context_notes[0].tags == {"ml"}
+        assert cache.get("missing") is None
+
+    def test_expired_entries_are_not_returned(self, cache):
+        """Test that entries older than the TTL miss."""
+        with patch("graphrag.services.answer_cache.time.time", return_value=0.0):
+            cache.put("k", make_result("cached"))
+
+        with patch("graphrag.services.answer_cache.time.time", return_value=61.0):
+            assert cache.get("k") is None
+
+    def test_cache_persists_across_instances(self, tmp_path):
+        """Test that answers survive reopening the database."""
+        path = str(tmp_path / "answers.sqlite3")
+        first = AnswerCache(path, ttl=60)
+        first.put("k", make_result("cached"))
+        first.close()
+
+        second = AnswerCache(path, ttl=60)
+        assert second.get("k").answer == "cached"
+        second.close()
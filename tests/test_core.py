@@ -1,15 +1,17 @@
 """Tests for the core ObsidianGraphRAG module."""
 
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch
 from pathlib import Path
-import tempfile
+from types import SimpleNamespace
 import shutil
 from datetime import datetime
 from uuid import uuid4
 
+from graphrag.config import Config
 from graphrag.core import ObsidianGraphRAG
-from graphrag.models import Note, Entity, EntityType, Relationship, RelationshipType
+from graphrag.models import (Note, Entity, EntityType, QueryResult, Relationship,
+                             RelationshipType)
 from graphrag.services.entity_detection import EntityDetectionResult
 
 
@@ -17,24 +19,57 @@ class TestObsidianGraphRAG:
     """Test the main ObsidianGraphRAG class."""
 
     @pytest.fixture
-    def mock_config(self):
+    def mock_config(self, vault_path):
         """Mock configuration for testing."""
-        with patch('graphrag.core.Config') as mock_config_class:
+        with patch('graphrag.core.Config', new_callable=Mock) as mock_config_class:
             mock_config = Mock()
-            mock_config.OBSIDIAN_VAULT_PATH = '/tmp/test-vault'
+            mock_config.OBSIDIAN_VAULT_PATH = vault_path
             mock_config_class.validate.return_value = None
-            mock_config_class.OBSIDIAN_VAULT_PATH = '/tmp/test-vault'
+            mock_config_class.OBSIDIAN_VAULT_PATH = vault_path
             yield mock_config_class
 
-    @pytest.fixture
-    def mock_services(self):
-        """Mock all the services."""
-        with patch.multiple('graphrag.core',
-                           EntityDetectionService=Mock(),
-                           KnowledgeGraphService=Mock(),
-                           QueryService=Mock(),
-                           FileWatcherService=Mock()):
-            yield
+    @pytest.fixture(scope="module", autouse=True)
+    def mock_services(self, request):
+        """Mock all the services, patched once for the module."""
+        patchers = [patch(f'graphrag.core.{name}', new_callable=Mock) for name in (
+            'EntityDetectionService', 'KnowledgeGraphService',
+            'QueryService', 'FileWatcherService')]
+        services = [patcher.start() for patcher in patchers]
+
+        def stop_patchers():
+            for patcher in reversed(patchers):
+                patcher.stop()
+        request.addfinalizer(stop_patchers)
+        return services
+
+    @pytest.fixture(autouse=True)
+    def fresh_services(self, mock_services):
+        """Clear what earlier tests configured on the shared service mocks."""
+        for service in mock_services:
+            service.reset_mock(return_value=True, side_effect=True)
+
+    @pytest.fixture(scope="module")
+    def graph_rag(self, mock_services, vault_path):
+        """Create one ObsidianGraphRAG over the mocked services for the module."""
+        with patch('graphrag.core.Config', new_callable=Mock) as mock_config_class:
+            mock_config_class.OBSIDIAN_VAULT_PATH = vault_path
+            return ObsidianGraphRAG()
+
+    @pytest.fixture(autouse=True)
+    def fresh_graph_rag(self, graph_rag):
+        """Clear what earlier tests configured on the shared instance's services."""
+        for service in (graph_rag.entity_detection_service, graph_rag.kg_service,
+                        graph_rag.query_service, graph_rag.file_watcher):
+            service.reset_mock(return_value=True, side_effect=True)
+
+    @pytest.fixture(scope="module")
+    def canned_query_result(self):
+        """One query result shared by the tests that only pass it through."""
+        result = Mock()
+        result.answer = "AI is artificial intelligence"
+        result.sources = ["source1"]
+        result.processing_time = 1.0
+        return result
 
     @pytest.fixture
     def temp_vault(self, tmp_path):
@@ -49,12 +84,12 @@ class TestObsidianGraphRAG:
         
         return vault_path
 
-    def test_initialization_success(self, mock_config, mock_services):
+    def test_initialization_success(self, mock_config, mock_services, vault_path):
         """Test successful initialization of ObsidianGraphRAG."""
         with patch('graphrag.core.logging.getLogger') as mock_logger:
             graph_rag = ObsidianGraphRAG()
             
-            assert graph_rag.vault_path == '/tmp/test-vault'
+            assert graph_rag.vault_path == vault_path
             assert graph_rag.entity_detection_service is not None
             assert graph_rag.kg_service is not None
             assert graph_rag.query_service is not None
@@ -62,44 +97,41 @@ class TestObsidianGraphRAG:
 
     def test_initialization_with_config_validation_error(self, mock_services):
         """Test initialization when config validation fails."""
-        with patch('graphrag.core.Config') as mock_config_class:
-            mock_config_class.validate.side_effect = Exception("Config error")
+        with patch('graphrag.core.Config', new_callable=Mock) as mock_config_class:
+            mock_config_class.validate.side_effect = ValueError("Config error")
             
-            with pytest.raises(Exception):
+            with pytest.raises(ValueError, match="Config error"):
                 ObsidianGraphRAG()
 
-    def test_build_knowledge_graph(self, obsidian_graph_rag, mock_entity_detection_service, mock_knowledge_graph_service):
-        """Test building the knowledge graph."""
+    @pytest.fixture
+    def patched_glob(self):
+        """Patch Path.glob to list two notes."""
         with patch('pathlib.Path.glob') as mock_glob:
             mock_glob.return_value = [Path("test1.md"), Path("test2.md")]
+            yield mock_glob
+
+    def test_build_knowledge_graph(self, obsidian_graph_rag, mock_entity_detection_service, mock_knowledge_graph_service, patched_glob):
+        """Test building the knowledge graph."""
+        with patch.object(obsidian_graph_rag, '_read_note_file') as mock_read:
+            mock_read.return_value = Mock()
+            
+            result = obsidian_graph_rag.build_initial_knowledge_graph()
             
-            with patch.object(obsidian_graph_rag, '_read_note_file') as mock_read:
-                mock_read.return_value = Mock()
-                
-                result = obsidian_graph_rag.build_initial_knowledge_graph()
-                
-                assert result["status"] == "success"
-                assert result["files_processed"] == 2
-
-    def test_build_knowledge_graph_with_errors(self, mock_config, mock_services):
+            assert result["status"] == "success"
+            assert result["files_processed"] == 2
+
+    def test_build_knowledge_graph_with_errors(self, mock_config, graph_rag, patched_glob):
         """Test knowledge graph building with file processing errors."""
-        graph_rag = ObsidianGraphRAG()
-        
-        with patch('pathlib.Path.glob') as mock_glob:
-            mock_glob.return_value = [Path("test1.md"), Path("test2.md")]
+        with patch.object(graph_rag, '_read_note_file') as mock_read:
+            mock_read.side_effect = [Mock(), Exception("File read error")]
             
-            with patch.object(graph_rag, '_read_note_file') as mock_read:
-                mock_read.side_effect = [Mock(), Exception("File read error")]
-                
-                result = graph_rag.build_initial_knowledge_graph()
-                
-                assert result["status"] == "success"
-                assert result["files_processed"] == 1  # Only one file processed successfully
-
-    def test_start_file_watcher_success(self, mock_config, mock_services):
+            result = graph_rag.build_initial_knowledge_graph()
+            
+            assert result["status"] == "success"
+            assert result["files_processed"] == 1  # Only one file processed successfully
+
+    def test_start_file_watcher_success(self, graph_rag):
         """Test starting the file watcher successfully."""
-        graph_rag = ObsidianGraphRAG()
-        
         with patch.object(graph_rag.file_watcher, 'start_watching') as mock_start:
             mock_start.return_value = True
             
@@ -108,10 +140,8 @@ class TestObsidianGraphRAG:
             assert result is True
             mock_start.assert_called_once()
 
-    def test_start_file_watcher_failure(self, mock_config, mock_services):
+    def test_start_file_watcher_failure(self, graph_rag):
         """Test starting the file watcher with failure."""
-        graph_rag = ObsidianGraphRAG()
-        
         with patch.object(graph_rag.file_watcher, 'start_watching') as mock_start:
             mock_start.return_value = False
             
@@ -120,131 +150,103 @@ class TestObsidianGraphRAG:
             assert result is False
             mock_start.assert_called_once()
 
-    def test_stop_file_watcher(self, mock_config, mock_services):
+    def test_stop_file_watcher(self, graph_rag):
         """Test stopping the file watcher."""
-        graph_rag = ObsidianGraphRAG()
-        
         with patch.object(graph_rag.file_watcher, 'stop_watching') as mock_stop:
             graph_rag.stop_file_watcher()
             
             mock_stop.assert_called_once()
 
-    def test_query_success(self, mock_config, mock_services):
+    def test_query_success(self, graph_rag, canned_query_result):
         """Test successful query processing."""
-        graph_rag = ObsidianGraphRAG()
-        
         with patch.object(graph_rag.query_service, 'query') as mock_query:
-            mock_result = Mock()
-            mock_query.return_value = mock_result
+            mock_query.return_value = canned_query_result
             
             result = graph_rag.query("What is AI?")
             
-            assert result == mock_result
+            assert result == canned_query_result
             mock_query.assert_called_once_with("What is AI?", None)
 
-    def test_query_with_context_size(self, mock_config, mock_services):
+    def test_query_with_context_size(self, graph_rag, canned_query_result):
         """Test query processing with custom context size."""
-        graph_rag = ObsidianGraphRAG()
-        
         with patch.object(graph_rag.query_service, 'query') as mock_query:
-            mock_result = Mock()
-            mock_query.return_value = mock_result
+            mock_query.return_value = canned_query_result
             
             result = graph_rag.query("What is AI?", context_size=10)
             
-            assert result == mock_result
+            assert result == canned_query_result
             mock_query.assert_called_once_with("What is AI?", 10)
 
-    def test_query_failure(self, mock_config, mock_services):
+    def test_query_failure(self, graph_rag):
         """Test query processing failure."""
-        graph_rag = ObsidianGraphRAG()
-        
         with patch.object(graph_rag.query_service, 'query') as mock_query:
             mock_query.side_effect = Exception("Query failed")
             
             with pytest.raises(Exception, match="Query failed"):
                 graph_rag.query("What is AI?")
 
-    def test_chat_mode_basic(self, mock_config, mock_services):
-        """Test basic chat mode functionality."""
-        graph_rag = ObsidianGraphRAG()
-        
-        # Mock the query service
-        mock_result = Mock()
-        mock_result.answer = "AI is artificial intelligence"
-        mock_result.sources = ["source1"]
-        mock_result.processing_time = 1.0
-        
-        graph_rag.query_service.query.return_value = mock_result
-        
-        # Mock input to simulate user interaction
-        with patch('builtins.input') as mock_input:
-            mock_input.side_effect = ["What is AI?", "quit"]
-            
-            # Mock console print
-            with patch('graphrag.core.console.print') as mock_console:
-                graph_rag.chat_mode()
-                
-                # Verify that query was called
-                graph_rag.query_service.query.assert_called_once_with("What is AI?", context_size=None)
-
-    def test_chat_mode_with_follow_up(self, mock_config, mock_services):
-        """Test chat mode with follow-up questions."""
-        graph_rag = ObsidianGraphRAG()
-        
-        # Mock the query service
-        mock_result = Mock()
-        mock_result.answer = "AI is artificial intelligence"
-        mock_result.sources = ["source1"]
-        mock_result.processing_time = 1.0
-        
-        graph_rag.query_service.query.return_value = mock_result
-        
-        # Mock input to simulate user interaction
-        with patch('builtins.input') as mock_input:
-            mock_input.side_effect = ["What is AI?", "Tell me more", "quit"]
-            
-            # Mock console print
-            with patch('graphrag.core.console.print') as mock_console:
-                graph_rag.chat_mode()
-                
-                # Verify that query was called twice
-                assert graph_rag.query_service.query.call_count == 2
-
-    def test_chat_mode_invalid_input(self, mock_config, mock_services):
-        """Test chat mode with invalid input."""
-        graph_rag = ObsidianGraphRAG()
-        
-        # Mock input to simulate user interaction
-        with patch('builtins.input') as mock_input:
-            mock_input.side_effect = ["", "   ", "quit"]
-            
-            # Mock console print
-            with patch('graphrag.core.console.print') as mock_console:
-                graph_rag.chat_mode()
-                
-                # Verify that no queries were made for empty input
-                graph_rag.query_service.query.assert_not_called()
-
-    def test_chat_mode_keyboard_interrupt(self, mock_config, mock_services):
+    @pytest.fixture
+    def chat_io(self, request):
+        """Patch the chat prompt's input and the console output."""
+        patchers = [patch('builtins.input'), patch('graphrag.core.console.print')]
+        mock_input, mock_print = [patcher.start() for patcher in patchers]
+
+        def stop_patchers():
+            for patcher in reversed(patchers):
+                patcher.stop()
+        request.addfinalizer(stop_patchers)
+        return SimpleNamespace(input=mock_input, print=mock_print)
+
+    @pytest.fixture
+    def streamed_answer(self, graph_rag):
+        """Have chat_query_stream stream a canned answer, then its result."""
+        result = QueryResult(answer="AI is artificial intelligence",
+                             context_notes=[], citations=[], confidence=0.8)
+        graph_rag.query_service.chat_query_stream.side_effect = (
+            lambda *args, **kwargs: iter([result.answer, result]))
+        return result
+
+    @pytest.mark.parametrize("inputs,expected_calls", [
+        pytest.param(["What is AI?", "quit"], [("What is AI?", [], None)], id="basic"),
+        pytest.param(["What is AI?", "Tell me more", "quit"],
+                     [("What is AI?", [], None),
+                      ("Tell me more", ["What is AI?"], None)], id="with_follow_up"),
+        pytest.param(["", "   ", "quit"], [], id="invalid_input"),
+    ])
+    def test_chat_mode(self, graph_rag, chat_io, streamed_answer, inputs, expected_calls):
+        """Test that chat mode streams once per non-empty question, with its history."""
+        # Snapshot the history each call saw, as chat_mode keeps appending to it
+        calls = []
+
+        def record(question, history, context_size):
+            calls.append((question, [turn["user"] for turn in history], context_size))
+            return iter([streamed_answer.answer, streamed_answer])
+
+        graph_rag.query_service.chat_query_stream.side_effect = record
+
+        # Simulate user interaction
+        chat_io.input.side_effect = inputs
+        graph_rag.chat_mode()
+        
+        assert calls == expected_calls
+        graph_rag.query_service.query.assert_not_called()
+        if expected_calls:
+            chat_io.print.assert_any_call(
+                streamed_answer.answer, end="", markup=False, highlight=False)
+
+    def test_chat_mode_keyboard_interrupt(self, graph_rag, chat_io, streamed_answer):
         """Test chat mode handling of keyboard interrupt."""
-        graph_rag = ObsidianGraphRAG()
+        # Simulate keyboard interrupt
+        chat_io.input.side_effect = KeyboardInterrupt()
         
-        # Mock input to simulate keyboard interrupt
-        with patch('builtins.input') as mock_input:
-            mock_input.side_effect = KeyboardInterrupt()
-            
-            # Mock console print
-            with patch('graphrag.core.console.print') as mock_console:
-                graph_rag.chat_mode()
-                
-                # Should handle interrupt gracefully
-                mock_console.assert_called()
-
-    def test_get_similar_entities(self, mock_config, mock_services):
-        """Test getting similar entities."""
-        graph_rag = ObsidianGraphRAG()
+        graph_rag.chat_mode()
         
+        # Should handle interrupt gracefully
+        chat_io.print.assert_called()
+        graph_rag.query_service.chat_query_stream.assert_not_called()
+
+    def test_get_similar_entities(self, graph_rag):
+        """Test getting similar entities."""
         # Mock the query service
         mock_entities = [
             {"name": "Entity 1", "similarity": 0.9},
@@ -258,10 +260,8 @@ class TestObsidianGraphRAG:
         assert result == mock_entities
         graph_rag.query_service.get_similar_entities.assert_called_once_with("AI", 5)
 
-    def test_get_topic_summary(self, mock_config, mock_services):
+    def test_get_topic_summary(self, graph_rag):
         """Test getting topic summary."""
-        graph_rag = ObsidianGraphRAG()
-        
         # Mock the query service
         mock_summary = "AI is a broad field covering machine learning, neural networks, and more."
         graph_rag.query_service.get_topic_summary.return_value = mock_summary
@@ -271,10 +271,8 @@ class TestObsidianGraphRAG:
         assert result == mock_summary
         graph_rag.query_service.get_topic_summary.assert_called_once_with("AI", 10)
 
-    def test_get_graph_statistics(self, mock_config, mock_services):
+    def test_get_graph_statistics(self, graph_rag):
         """Test getting graph statistics."""
-        graph_rag = ObsidianGraphRAG()
-        
         # Mock the knowledge graph service
         mock_stats = {
             "total_notes": 100,
@@ -289,13 +287,10 @@ class TestObsidianGraphRAG:
         assert result == mock_stats
         graph_rag.kg_service.get_graph_stats.assert_called_once()
 
-    def test_parse_markdown_file_success(self, mock_config, mock_services):
+    def test_parse_markdown_file_success(self, mock_config, graph_rag, tmp_path):
         """Test successful markdown file parsing."""
-        graph_rag = ObsidianGraphRAG()
-        
-        # Create a temporary markdown file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-            f.write("""---
+        note_file = tmp_path / "note.md"
+        note_file.write_text("""---
 title: Test Note
 tags: [test, ai]
 ---
@@ -306,63 +301,42 @@ This is a test note about [[AI]] and [[machine learning]].
 
 [External Link](https://example.com)
 """)
-            temp_file = f.name
         
-        try:
-            # Parse the file
-            note = graph_rag._parse_markdown_file(Path(temp_file))
-            
-            assert note.title == "Test Note"
-            assert "test" in note.tags
-            assert "ai" in note.tags
-            assert "[[AI]]" in note.links
-            assert "[[machine learning]]" in note.links
-            assert "https://example.com" in note.links
-            
-        finally:
-            # Clean up
-            import os
-            os.unlink(temp_file)
+        # Parse the file
+        note = graph_rag._parse_markdown_file(note_file)
+        
+        assert note.title == "Test Note"
+        assert "test" in note.tags
+        assert "ai" in note.tags
+        assert "[[AI]]" in note.links
+        assert "[[machine learning]]" in note.links
+        assert "https://example.com" in note.links
 
-    def test_parse_markdown_file_no_frontmatter(self, mock_config, mock_services):
+    def test_parse_markdown_file_no_frontmatter(self, mock_config, graph_rag, tmp_path):
         """Test markdown file parsing without frontmatter."""
-        graph_rag = ObsidianGraphRAG()
-        
-        # Create a temporary markdown file without frontmatter
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-            f.write("""# Test Note
+        note_file = tmp_path / "note.md"
+        note_file.write_text("""# Test Note
 
 This is a test note without frontmatter.
 
 [[Internal Link]]
 """)
-            temp_file = f.name
         
-        try:
-            # Parse the file
-            note = graph_rag._parse_markdown_file(Path(temp_file))
-            
-            assert note.title == "Test Note"
-            assert note.frontmatter == {}
-            assert "[[Internal Link]]" in note.links
-            
-        finally:
-            # Clean up
-            import os
-            os.unlink(temp_file)
+        # Parse the file
+        note = graph_rag._parse_markdown_file(note_file)
+        
+        assert note.title == "Test Note"
+        assert note.frontmatter == {}
+        assert "[[Internal Link]]" in note.links
 
-    def test_parse_markdown_file_with_errors(self, mock_config, mock_services):
+    def test_parse_markdown_file_with_errors(self, mock_config, graph_rag):
         """Test markdown file parsing with errors."""
-        graph_rag = ObsidianGraphRAG()
-        
         # Test with non-existent file
         with pytest.raises(FileNotFoundError):
             graph_rag._parse_markdown_file(Path("/non/existent/file.md"))
 
-    def test_extract_links_from_content(self, mock_config, mock_services):
+    def test_extract_links_from_content(self, graph_rag):
         """Test link extraction from content."""
-        graph_rag = ObsidianGraphRAG()
-        
         content = """
         This note mentions [[AI]] and [[machine learning]].
         It also has external links like [OpenAI](https://openai.com).
@@ -380,20 +354,16 @@ This is a test note without frontmatter.
         # Check external links
         assert "https://openai.com" in links
 
-    def test_extract_links_from_content_no_links(self, mock_config, mock_services):
+    def test_extract_links_from_content_no_links(self, graph_rag):
         """Test link extraction from content with no links."""
-        graph_rag = ObsidianGraphRAG()
-        
         content = "This is a simple note with no links."
         
         links = graph_rag._extract_links_from_content(content)
         
         assert links == set()
 
-    def test_extract_links_from_content_mixed_links(self, mock_config, mock_services):
+    def test_extract_links_from_content_mixed_links(self, graph_rag):
         """Test link extraction from content with mixed link types."""
-        graph_rag = ObsidianGraphRAG()
-        
         content = """
         # Mixed Links Note
         
@@ -413,10 +383,8 @@ This is a test note without frontmatter.
         assert "https://example1.com" in links
         assert "https://example2.com" in links
 
-    def test_cleanup_on_exit(self, mock_config, mock_services):
+    def test_cleanup_on_exit(self, graph_rag):
         """Test cleanup when exiting."""
-        graph_rag = ObsidianGraphRAG()
-        
         # Mock the services
         graph_rag.kg_service.close = Mock()
         graph_rag.file_watcher.stop_watching = Mock()
@@ -428,16 +396,110 @@ This is a test note without frontmatter.
         graph_rag.kg_service.close.assert_called_once()
         graph_rag.file_watcher.stop_watching.assert_called_once()
 
-    def test_context_manager(self, mock_config, mock_services):
+    def test_context_manager(self, graph_rag, vault_path):
         """Test ObsidianGraphRAG as a context manager."""
-        graph_rag = ObsidianGraphRAG()
-        
         # Mock the cleanup method
-        graph_rag.cleanup = Mock()
-        
-        with graph_rag:
-            # Should be able to use the instance
-            assert graph_rag.vault_path == '/tmp/test-vault'
-        
-        # Cleanup should be called when exiting context
-        graph_rag.cleanup.assert_called_once() 
\ No newline at end of file
+        with patch.object(graph_rag, 'cleanup', create=True) as mock_cleanup:
+            with graph_rag:
+                # Should be able to use the instance
+                assert graph_rag.vault_path == vault_path
+            
+            # Cleanup should be called when exiting context
+            mock_cleanup.assert_called_once()
+
+
+class TestBuildKnowledgeGraph:
+    """Test building the knowledge graph from a vault on disk."""
+
+    @pytest.fixture
+    def graph_rag(self, tmp_path):
+        """Create an ObsidianGraphRAG over a small vault with mocked services."""
+        for i in range(3):
+            (tmp_path / f"note{i}.md").write_text(f"# Note {i}\n\nBody {i}")
+
+        with patch.object(Config, 'OBSIDIAN_VAULT_PATH', str(tmp_path)), \
+             patch.object(Config, 'OPENAI_API_KEY', 'test-key'), \
+             patch.multiple('graphrag.core',
+                            EntityDetectionService=Mock(),
+                            KnowledgeGraphService=Mock(),
+                            QueryService=Mock(),
+                            FileWatcherService=Mock()):
+            graph_rag = ObsidianGraphRAG()
+
+        graph_rag.entity_detection_service.detect_entities.return_value = Mock(
+            entities=[], relationships=[])
+        graph_rag.kg_service.get_graph_stats.return_value = {}
+        return graph_rag
+
+    def test_notes_are_upserted_in_one_batch(self, graph_rag):
+        """Test that all notes are written with a single bulk upsert."""
+        result = graph_rag.build_initial_knowledge_graph()
+
+        assert result["files_processed"] == 3
+        graph_rag.kg_service.bulk_upsert_notes.assert_called_once()
+        notes = graph_rag.kg_service.bulk_upsert_notes.call_args[0][0]
+        assert [note.title for note in notes] == ["note0", "note1", "note2"]
+        graph_rag.kg_service.create_note_node.assert_not_called()
+        assert graph_rag.kg_service.update_note_embeddings.call_count == 3
+
+    def test_embeddings_flushed_before_stats(self, graph_rag):
+        """Test that the last embedding batch is written before the build returns."""
+        calls = Mock()
+        calls.attach_mock(graph_rag.kg_service.flush_note_embeddings, "flush")
+        calls.attach_mock(graph_rag.kg_service.get_graph_stats, "stats")
+
+        graph_rag.build_initial_knowledge_graph()
+
+        assert [c[0] for c in calls.mock_calls] == ["flush", "stats"]
+
+    def test_notes_are_upserted_per_batch_size(self, graph_rag):
+        """Test that the upsert batch size splits the writes."""
+        with patch.object(Config, 'NOTE_UPSERT_BATCH_SIZE', 2):
+            result = graph_rag.build_initial_knowledge_graph()
+
+        assert result["files_processed"] == 3
+        assert graph_rag.kg_service.bulk_upsert_notes.call_count == 2
+
+    def test_failed_batch_write_skips_only_that_batch(self, graph_rag):
+        """Test that a failing bulk upsert is counted and the build continues."""
+        graph_rag.kg_service.bulk_upsert_notes.side_effect = [
+            None, Exception("write failed")]
+
+        with patch.object(Config, 'NOTE_UPSERT_BATCH_SIZE', 2):
+            result = graph_rag.build_initial_knowledge_graph()
+
+        assert result["status"] == "success"
+        assert result["files_processed"] == 2
+        assert result["files_failed"] == 1
+        assert graph_rag.kg_service.update_note_embeddings.call_count == 2
+        graph_rag.kg_service.flush_note_embeddings.assert_called_once()
+
+    def test_read_errors_skip_only_that_file(self, graph_rag):
+        """Test that a failing read does not stop the rest of the build."""
+        real_read = graph_rag._read_note_file
+
+        def flaky_read(file_path):
+            if file_path.name == "note1.md":
+                raise OSError("read failed")
+            return real_read(file_path)
+
+        with patch.object(graph_rag, '_read_note_file', side_effect=flaky_read):
+            result = graph_rag.build_initial_knowledge_graph()
+
+        assert result["files_processed"] == 2
+        notes = graph_rag.kg_service.bulk_upsert_notes.call_args[0][0]
+        assert [note.title for note in notes] == ["note0", "note2"]
+
+    def test_vault_scan_finds_nested_notes_and_skips_ignored(self, graph_rag, tmp_path):
+        """Test that the scan recurses into folders but not into ignored ones."""
+        (tmp_path / "sub" / "deeper").mkdir(parents=True)
+        (tmp_path / "sub" / "deeper" / "nested.md").write_text("# Nested")
+        (tmp_path / "sub" / "image.png").write_bytes(b"")
+        (tmp_path / "skip").mkdir()
+        (tmp_path / "skip" / "hidden.md").write_text("# Hidden")
+
+        with patch.object(Config, 'IGNORE_PATTERNS', ["skip/"]):
+            files = graph_rag._get_all_markdown_files()
+
+        assert files == sorted([tmp_path / f"note{i}.md" for i in range(3)] +
+                               [tmp_path / "sub" / "deeper" / "nested.md"])
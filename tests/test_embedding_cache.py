@@ -0,0 +1,67 @@
+"""Tests for the EmbeddingCache."""
+
+import pytest
+
+from graphrag.services.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache:
+    """Test cases for EmbeddingCache."""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Create an EmbeddingCache in a temporary directory."""
+        cache = EmbeddingCache(str(tmp_path / "cache" / "embeddings.sqlite3"))
+        yield cache
+        cache.close()
+
+    def test_content_hash_is_stable(self):
+        """Test that identical content hashes to the same key."""
+        assert EmbeddingCache.content_hash("abc") == EmbeddingCache.content_hash("abc")
+        assert EmbeddingCache.content_hash("abc") != EmbeddingCache.content_hash("abd")
+
+    def test_get_missing_returns_none(self, cache):
+        """Test that unknown hashes are cache misses."""
+        assert cache.get("missing") is None
+        assert cache.get_many(["missing"]) == {}
+
+    def test_put_and_get_round_trip(self, cache):
+        """Test that stored vectors are returned for their hash."""
+        cache.put_many({"a": [0.5, 1.0], "b": [0.25]})
+
+        assert cache.get("a") == [0.5, 1.0]
+        assert cache.get_many(["a", "b", "c"]) == {"a": [0.5, 1.0], "b": [0.25]}
+
+    def test_get_many_spans_lookup_chunks(self, cache):
+        """Test that lookups larger than one chunk return every hit."""
+        cache.put_many({str(i): [float(i)] for i in range(5)})
+        cache.LOOKUP_CHUNK_SIZE = 2
+
+        assert cache.get_many([str(i) for i in range(6)]) == {
+            str(i): [float(i)] for i in range(5)}
+
+    def test_cache_persists_across_instances(self, tmp_path):
+        """Test that vectors survive reopening the database."""
+        path = str(tmp_path / "embeddings.sqlite3")
+        first = EmbeddingCache(path)
+        first.put_many({"a": [0.5]})
+        first.close()
+
+        second = EmbeddingCache(path)
+        assert second.get("a") == [0.5]
+        second.close()
+
+    def test_vectors_are_kept_per_model(self, tmp_path):
+        """Test that a different model or dimensions misses earlier vectors."""
+        path = str(tmp_path / "embeddings.sqlite3")
+        ada = EmbeddingCache(path, model="text-embedding-ada-002/1536")
+        ada.put_many({"a": [0.5]})
+        ada.close()
+
+        small = EmbeddingCache(path, model="text-embedding-3-small/512")
+        assert small.get("a") is None
+        small.close()
+
+        reopened = EmbeddingCache(path, model="text-embedding-ada-002/1536")
+        assert reopened.get("a") == [0.5]
+        reopened.close()
@@ -2,46 +2,83 @@
 
 import json
 import pytest
+from types import SimpleNamespace
 from unittest.mock import Mock, patch, mock_open
-from openai import OpenAI
 from pathlib import Path
 
-from graphrag.services.entity_detection import EntityDetectionService
+from graphrag.services.entity_detection import EntityDetectionService, _read_entity_types
 from graphrag.models import EntityDetectionResult, EntityType
-from graphrag.config import Config
 from graphrag.models import Note
 
 
+CONFIG = SimpleNamespace(
+    openai_api_key="test-key",
+    openai_org_id="test-org",
+    openai_entity_detection_model="gpt-4o-mini",
+)
+
+
+class _OpenAIStub:
+    """The slice of the OpenAI client EntityDetectionService calls."""
+
+    class _Chat:
+        class _Completions:
+            def create(self, **kwargs): ...
+
+        completions = _Completions()
+
+    chat = _Chat()
+
+
 class TestEntityDetectionService:
     """Test cases for EntityDetectionService."""
 
     @pytest.fixture
     def mock_config(self):
-        """Mock configuration for testing."""
-        config = Mock(spec=Config)
-        config.openai_api_key = "test-key"
-        config.openai_org_id = "test-org"
-        config.openai_entity_detection_model = "gpt-4o-mini"
-        return config
+        """Plain configuration namespace for testing."""
+        return CONFIG
 
     @pytest.fixture
     def mock_openai_client(self):
         """Mock OpenAI client for testing."""
-        mock_client = Mock(spec=OpenAI)
+        mock_client = Mock(spec_set=_OpenAIStub)
         return mock_client
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def entity_detection_service(self):
-        """Create an EntityDetectionService instance for testing."""
+        """Create one EntityDetectionService shared by the read-only tests."""
         return EntityDetectionService()
 
+    @pytest.fixture
+    def restore_client(self, entity_detection_service):
+        """Put back the shared service's client after tests that swap it."""
+        client = entity_detection_service.client
+        yield
+        entity_detection_service.client = client
+
+    @pytest.fixture(scope="module")
+    def note(self):
+        """One validated note shared by the tests that only read it."""
+        return Note(
+            file_path="test.md",
+            title="Test Note",
+            content="This is a test note about AI and machine learning."
+        )
+
+    @pytest.fixture
+    def uncached_entity_types(self):
+        """Clear the entity types cache so a patched filesystem is read."""
+        _read_entity_types.cache_clear()
+        yield
+        _read_entity_types.cache_clear()
+
     def test_service_initialization(self, mock_config):
         """Test that the service initializes correctly."""
         with patch('graphrag.services.entity_detection.OpenAI') as mock_openai:
             service = EntityDetectionService()
             assert service is not None
 
-    def test_load_entity_types_success(self, entity_detection_service):
+    def test_load_entity_types_success(self, entity_detection_service, uncached_entity_types):
         """Test successful loading of entity types from file."""
         with patch('builtins.open', mock_open(read_data='"Person", "Organization", "Concept"')):
             with patch('pathlib.Path.exists', return_value=True):
@@ -51,13 +88,13 @@ class TestEntityDetectionService:
                     assert "Organization" in types
                     assert "Concept" in types
 
-    def test_load_entity_types_file_not_found(self, entity_detection_service):
+    def test_load_entity_types_file_not_found(self, entity_detection_service, uncached_entity_types):
         """Test handling when entity types file doesn't exist."""
         with patch('pathlib.Path.exists', return_value=False):
             types = entity_detection_service._load_entity_types()
             assert types == []
 
-    def test_load_entity_types_filters_numeric(self, entity_detection_service):
+    def test_load_entity_types_filters_numeric(self, entity_detection_service, uncached_entity_types):
         """Test that numeric entity types are filtered out."""
         with patch('builtins.open', mock_open(read_data='"Person", "123", "Organization", "456"')):
             with patch('pathlib.Path.exists', return_value=True):
@@ -68,53 +105,56 @@ class TestEntityDetectionService:
                     assert "123" not in types
                     assert "456" not in types
 
-    def test_build_prompt(self, entity_detection_service):
+    def test_load_entity_types_reads_file_once(self, entity_detection_service,
+                                                uncached_entity_types):
+        """Test that the entity types file is parsed once and then cached."""
+        with patch('builtins.open', mock_open(read_data='"Person"')) as mocked_open:
+            with patch('pathlib.Path.exists', return_value=True):
+                first = entity_detection_service._load_entity_types()
+                second = entity_detection_service._load_entity_types()
+
+        assert first == second == ["Person"]
+        assert first is not second
+        mocked_open.assert_called_once()
+
+    def test_build_prompt(self, entity_detection_service, note):
         """Test that the prompt is built correctly."""
-        note = Note(
-            file_path="test.md",
-            title="Test Note",
-            content="This is a test note about AI and machine learning."
-        )
-        
         prompt = entity_detection_service._create_entity_detection_prompt(note)
         
         assert "Test Note" in prompt
         assert "This is a test note about AI and machine learning" in prompt
         assert "Analyze the following Obsidian note" in prompt
 
-    def test_detect_entities_success(self, entity_detection_service, mock_openai_client):
+    def test_detect_entities_success(self, entity_detection_service, mock_openai_client, note,
+                                     restore_client):
         """Test successful entity detection."""
-        note = Note(
-            file_path="test.md",
-            title="Test Note",
-            content="This is a test note about AI and machine learning."
-        )
+        entity_detection_service.client = mock_openai_client
         
-        with patch('graphrag.services.entity_detection.OpenAI', return_value=mock_openai_client):
-            result = entity_detection_service.detect_entities(note)
-            
-            assert result.note_id == note.id
-            assert isinstance(result.entities, list)
-            assert isinstance(result.relationships, list)
-            assert result.confidence > 0
-            assert result.processing_time > 0
-
-    def test_detect_entities_openai_error(self, entity_detection_service, mock_openai_client):
-        """Test entity detection fallback when OpenAI fails."""
-        note = Note(
-            file_path="test.md",
-            title="Test Note",
-            content="This is a test note about AI and machine learning."
-        )
+        result = entity_detection_service.detect_entities(note)
         
-        with patch('graphrag.services.entity_detection.OpenAI', return_value=mock_openai_client):
-            mock_openai_client.chat.completions.create.side_effect = Exception("API Error")
-            
-            result = entity_detection_service.detect_entities(note)
-            
-            assert result.note_id == note.id
-            assert result.confidence == 0.5  # Fallback confidence
-            assert result.processing_time > 0
+        assert result.note_id == note.id
+        assert isinstance(result.entities, list)
+        assert isinstance(result.relationships, list)
+        assert result.confidence > 0
+        assert result.processing_time > 0
+
+    @pytest.mark.parametrize("error", [
+        Exception("API Error"),
+        Exception("Rate limit exceeded"),
+    ], ids=["api_error", "rate_limited"])
+    def test_detect_entities_fallback_on_openai_failure(self, entity_detection_service,
+                                                        mock_openai_client, note, restore_client,
+                                                        error):
+        """Test entity detection fallback when the OpenAI call raises."""
+        entity_detection_service.client = mock_openai_client
+        mock_openai_client.chat.completions.create.side_effect = error
+        
+        result = entity_detection_service.detect_entities(note)
+        
+        assert isinstance(result, EntityDetectionResult)
+        assert result.note_id == note.id
+        assert result.confidence == 0.5  # Fallback confidence
+        assert result.processing_time > 0
 
     def test_detect_entities_invalid_json(self, entity_detection_service, mock_openai_client):
         """Test that entity detection falls back when OpenAI returns invalid JSON."""
@@ -223,16 +263,4 @@ class TestEntityDetectionService:
         assert "John Smith" in entity_names
         assert "Google" in entity_names
         assert "AI project" in entity_names
-        assert "San Francisco" in entity_names
-
-    def test_detect_entities_rate_limiting(self, entity_detection_service, mock_openai_client):
-        """Test that entity detection handles rate limiting gracefully."""
-        # Simulate rate limiting
-        mock_openai_client.chat.completions.create.side_effect = Exception("Rate limit exceeded")
-        
-        result = entity_detection_service.detect_entities("Test content")
-        
-        assert isinstance(result, EntityDetectionResult)
-        # Should fall back to basic detection
-        assert result.confidence == 0.5
-        assert len(result.entities) >= 0  # May or may not find entities in fallback 
\ No newline at end of file
+        assert "San Francisco" in entity_names
\ No newline at end of file
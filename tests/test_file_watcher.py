@@ -1,14 +1,23 @@
 """Tests for the FileWatcherService."""
 
 import os
+import threading
 import time
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, mock_open
 from pathlib import Path
 from watchdog.events import FileSystemEvent, FileCreatedEvent, FileModifiedEvent, FileDeletedEvent, FileMovedEvent
-
-from graphrag.services.file_watcher import FileWatcherService, ObsidianFileHandler
+from watchdog.observers.polling import PollingObserver
+
+from graphrag.services.file_watcher import (
+    FileWatcherService,
+    ObsidianFileHandler,
+    get_filesystem_type,
+    is_network_filesystem,
+)
 from graphrag.config import Config
+from graphrag.models import Note
+from graphrag.services.embedding_cache import EmbeddingCache
 
 
 class TestObsidianFileHandler:
@@ -352,4 +361,466 @@ class TestFileWatcherService:
         # Delete event
         mock_obsidian_graph_rag.remove_note.reset_mock()
         service.handle_file_event("deleted", "/tmp/test-note.md")
-        mock_obsidian_graph_rag.remove_note.assert_called_once_with("/tmp/test-note.md") 
\ No newline at end of file
+        mock_obsidian_graph_rag.remove_note.assert_called_once_with("/tmp/test-note.md") 
+
+class TestNoteParsing:
+    """Test cases for reading and parsing note files."""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Create a FileWatcherService over a temporary vault."""
+        return FileWatcherService(
+            vault_path=str(tmp_path),
+            entity_detection_service=Mock(),
+            knowledge_graph_service=Mock()
+        )
+
+    def test_parse_frontmatter(self, service):
+        """Test that frontmatter is separated from the note body."""
+        frontmatter, body = service._parse_frontmatter(
+            "---\ntitle: Test\ntags: [a, b]\n---\n\n# Heading\n\nBody with --- dashes")
+
+        assert frontmatter == {"title": "Test", "tags": ["a", "b"]}
+        assert body == "# Heading\n\nBody with --- dashes"
+
+    def test_parse_frontmatter_without_frontmatter(self, service):
+        """Test that content without frontmatter is returned unchanged."""
+        content = "# Heading\n\nBody"
+
+        assert service._parse_frontmatter(content) == ({}, content)
+
+    def test_parse_frontmatter_unterminated(self, service):
+        """Test that an unterminated frontmatter block is left in the body."""
+        content = "---\ntitle: Test\nno closing marker"
+
+        assert service._parse_frontmatter(content) == ({}, content)
+
+    def test_parse_frontmatter_invalid_yaml(self, service):
+        """Test that invalid YAML yields empty frontmatter."""
+        frontmatter, body = service._parse_frontmatter("---\n: [unclosed\n---\nBody")
+
+        assert frontmatter == {}
+        assert body == "Body"
+
+    def test_read_note_file(self, service, tmp_path):
+        """Test that a note file is read into a Note."""
+        note_path = tmp_path / "note.md"
+        note_path.write_bytes(
+            "---\ntitle: Café\ntags: [x]\n---\nSee [[Other]]\n".encode("utf-8"))
+
+        note = service._read_note_file(str(note_path))
+
+        assert note.title == "Café"
+        assert note.content == "See [[Other]]"
+        assert note.tags == {"x"}
+        assert note.links == {"Other"}
+
+    def test_read_note_file_too_large(self, service, tmp_path):
+        """Test that notes above MAX_NOTE_SIZE are skipped."""
+        note_path = tmp_path / "large.md"
+        note_path.write_text("x" * 20)
+
+        with patch.object(Config, 'MAX_NOTE_SIZE', 10):
+            assert service._read_note_file(str(note_path)) is None
+
+    def test_read_note_file_stats_the_open_file(self, service, tmp_path):
+        """Test that the size check uses the open descriptor, not a path lookup."""
+        note_path = tmp_path / "note.md"
+        note_path.write_text("Body")
+
+        with patch.object(Path, 'stat', side_effect=AssertionError("path stat")):
+            note = service._read_note_file(str(note_path))
+
+        assert note.content == "Body"
+
+
+class TestIngestionPool:
+    """Test cases for dispatching file changes to the ingestion pool."""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Create a FileWatcherService with stubbed processing."""
+        service = FileWatcherService(
+            vault_path=str(tmp_path),
+            entity_detection_service=Mock(),
+            knowledge_graph_service=Mock()
+        )
+        yield service
+        service._pool.shutdown(wait=True)
+
+    def test_update_runs_on_worker_thread(self, service):
+        """Test that note updates are processed off the calling thread."""
+        threads = []
+        service._read_note_file = lambda path: threads.append(
+            threading.current_thread().name)
+
+        service._handle_file_change("/vault/note.md", "modified")
+        service._dispatch_due(float("inf"))
+        service._pool.shutdown(wait=True)
+
+        assert len(threads) == 1
+        assert threads[0].startswith("graphrag-ingest")
+
+    def test_deletion_dispatched_to_pool(self, service):
+        """Test that deletions are processed through the pool."""
+        service._handle_file_change("/vault/note.md", "deleted")
+        service._pool.shutdown(wait=True)
+
+        service.kg_service.delete_note.assert_called_once_with("/vault/note.md")
+
+    def test_newer_event_replaces_queued_work(self, service):
+        """Test that queued work for a file is replaced by a newer event."""
+        release = threading.Event()
+        calls = []
+
+        def blocking(label):
+            release.wait()
+            calls.append(label)
+
+        service._pool = service._pool.__class__(max_workers=1)
+        service._submit("/other.md", blocking, "other")
+        first = service._submit("/note.md", calls.append, "first")
+        second = service._submit("/note.md", calls.append, "second")
+        release.set()
+        service._pool.shutdown(wait=True)
+
+        assert first.cancelled()
+        assert second.done()
+        assert calls == ["other", "second"]
+        assert service._pending == {}
+
+    def test_newer_event_waits_for_running_work(self, service):
+        """Test that a newer event runs after in-flight work for the same file."""
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def running(label):
+            started.set()
+            release.wait()
+            calls.append(label)
+
+        service._submit("/note.md", running, "first")
+        started.wait()
+        service._submit("/note.md", calls.append, "second")
+        release.set()
+        service._pool.shutdown(wait=True)
+
+        assert calls == ["first", "second"]
+
+    def test_replacing_queued_work_still_waits_for_running_work(self, service):
+        """Test that a third event for a file never overlaps the first."""
+        started = threading.Event()
+        release_note = threading.Event()
+        release_other = threading.Event()
+        running = set()
+        overlaps = []
+        calls = []
+
+        def job(label, release=None):
+            overlaps.extend((label, other) for other in running)
+            running.add(label)
+            started.set()
+            if release is not None:
+                release.wait()
+            running.discard(label)
+            calls.append(label)
+
+        service._pool = service._pool.__class__(max_workers=2)
+        service._submit("/note.md", job, "first", release_note)
+        started.wait()
+        service._submit("/other.md", job, "other", release_other)
+        second = service._submit("/note.md", job, "second")
+        service._submit("/note.md", job, "third")
+        release_other.set()
+        time.sleep(0.05)
+        release_note.set()
+        service._pool.shutdown(wait=True)
+
+        assert second.cancelled()
+        assert calls.index("first") < calls.index("third")
+        assert ("third", "first") not in overlaps
+
+
+class TestObserverSelection:
+    """Test cases for choosing between native and polling observers."""
+
+    MOUNTS = (
+        "/dev/sda1 / ext4 rw 0 0\n"
+        "server:/export /mnt/nfs nfs4 rw 0 0\n"
+        "//host/share /mnt/my\\040share cifs rw 0 0\n"
+        "rclone: /mnt/cloud fuse.rclone rw 0 0\n"
+    )
+
+    @pytest.fixture
+    def proc_mounts(self):
+        """Serve a fake /proc/mounts."""
+        with patch('graphrag.services.file_watcher.open', mock_open(read_data=self.MOUNTS)):
+            yield
+
+    @pytest.mark.parametrize("path, expected", [
+        ("/home/user/vault", "ext4"),
+        ("/mnt/nfs/vault", "nfs4"),
+        ("/mnt/nfs", "nfs4"),
+        ("/mnt/nfsother", "ext4"),
+        ("/mnt/my share/vault", "cifs"),
+        ("/mnt/cloud/vault", "fuse.rclone"),
+    ])
+    def test_get_filesystem_type(self, proc_mounts, path, expected):
+        """Test that the longest matching mount point wins."""
+        assert get_filesystem_type(Path(path)) == expected
+
+    @pytest.mark.parametrize("path, expected", [
+        ("/home/user/vault", False),
+        ("/mnt/nfs/vault", True),
+        ("/mnt/my share/vault", True),
+        ("/mnt/cloud/vault", True),
+    ])
+    def test_is_network_filesystem(self, proc_mounts, path, expected):
+        """Test that network and FUSE mounts are detected."""
+        assert is_network_filesystem(Path(path)) is expected
+
+    @pytest.mark.parametrize("mode, network, polling", [
+        ("auto", True, True),
+        ("auto", False, False),
+        ("true", False, True),
+        ("false", True, False),
+    ])
+    def test_observer_choice(self, tmp_path, mode, network, polling):
+        """Test that polling is used on network vaults or when forced."""
+        with patch.object(Config, 'FILE_WATCHER_POLLING', mode), \
+             patch('graphrag.services.file_watcher.is_network_filesystem', return_value=network):
+            service = FileWatcherService(
+                vault_path=str(tmp_path),
+                entity_detection_service=Mock(),
+                knowledge_graph_service=Mock()
+            )
+
+        assert isinstance(service.observer, PollingObserver) is polling
+        service._pool.shutdown(wait=True)
+
+
+class TestDebounce:
+    """Test cases for per-file event debouncing."""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Create a FileWatcherService that records dispatched work."""
+        service = FileWatcherService(
+            vault_path=str(tmp_path),
+            entity_detection_service=Mock(),
+            knowledge_graph_service=Mock()
+        )
+        service._submit = Mock()
+        yield service
+        service._pool.shutdown(wait=True)
+
+    def test_repeated_events_are_coalesced(self, service):
+        """Test that a burst of events for a file is dispatched once."""
+        service.clock = Mock(side_effect=[100.0, 101.0])
+        service._handle_file_change("/vault/a.md", "modified")
+        service._handle_file_change("/vault/a.md", "modified")
+
+        service._dispatch_due(102.5)
+        service._submit.assert_not_called()
+
+        service._dispatch_due(103.0)
+        service._submit.assert_called_once_with(
+            "/vault/a.md", service._process_note_update, "/vault/a.md")
+        assert service.pending_events == {}
+
+    def test_burst_keeps_one_deadline_per_file(self, service):
+        """Test that repeated events move the deadline instead of queueing wakeups."""
+        service.clock = Mock(side_effect=[100.0, 100.5, 101.0])
+        for _ in range(3):
+            service._handle_file_change("/vault/a.md", "modified")
+
+        assert service._deadlines == [(102.0, "/vault/a.md")]
+        assert service.pending_events["/vault/a.md"] == (103.0, "modified")
+
+        service._dispatch_due(102.0)
+        assert service._deadlines == [(103.0, "/vault/a.md")]
+        service._submit.assert_not_called()
+
+    def test_files_are_dispatched_independently(self, service):
+        """Test that each file is dispatched when its own deadline passes."""
+        service.clock = Mock(side_effect=[100.0, 101.0])
+        service._handle_file_change("/vault/a.md", "created")
+        service._handle_file_change("/vault/b.md", "modified")
+
+        service._dispatch_due(102.0)
+        assert [c.args[0] for c in service._submit.call_args_list] == ["/vault/a.md"]
+        assert list(service.pending_events) == ["/vault/b.md"]
+
+    def test_deletion_supersedes_pending_update(self, service):
+        """Test that a deletion is dispatched at once and drops the pending update."""
+        service._handle_file_change("/vault/a.md", "modified")
+        service._handle_file_change("/vault/a.md", "deleted")
+        service._dispatch_due(float("inf"))
+
+        service._submit.assert_called_once_with(
+            "/vault/a.md", service._process_note_deletion, "/vault/a.md")
+
+    def test_entries_are_bounded(self, service):
+        """Test that events beyond the debounce limit are dispatched at once."""
+        with patch.object(FileWatcherService, 'DEBOUNCE_MAX_ENTRIES', 2):
+            for name in ("a", "b", "c"):
+                service._handle_file_change(f"/vault/{name}.md", "modified")
+
+        assert list(service.pending_events) == ["/vault/a.md", "/vault/b.md"]
+        service._submit.assert_called_once_with(
+            "/vault/c.md", service._process_note_update, "/vault/c.md")
+
+    def test_debounce_thread_dispatches_after_delay(self, service):
+        """Test that the debounce thread submits an event once it settles."""
+        submitted = threading.Event()
+        service._submit.side_effect = lambda *args: submitted.set()
+        service.debounce_delay = 0.05
+        service.observer = Mock()
+
+        service.start_watching()
+        service._handle_file_change("/vault/a.md", "modified")
+
+        assert submitted.wait(timeout=5)
+        assert service.pending_events == {}
+        service.stop_watching()
+
+    def test_stop_watching_flushes_pending_events(self, service):
+        """Test that stopping dispatches events still waiting to settle."""
+        service.observer = Mock()
+        service.start_watching()
+        service._handle_file_change("/vault/a.md", "modified")
+
+        service.stop_watching()
+
+        service._submit.assert_called_once_with(
+            "/vault/a.md", service._process_note_update, "/vault/a.md")
+        assert not service._debounce_thread.is_alive()
+
+
+class TestFileHandlerDispatch:
+    """Test cases for ObsidianFileHandler forwarding events to its callback."""
+
+    @pytest.fixture
+    def callback(self):
+        """Mock callback receiving (file_path, event_type)."""
+        return Mock()
+
+    @pytest.fixture
+    def handler(self, callback):
+        """Create an ObsidianFileHandler with the default ignore patterns."""
+        return ObsidianFileHandler(Path("/vault"), callback)
+
+    def test_event_path_forwarded_as_string(self, handler, callback):
+        """Test that the raw event path string reaches the callback."""
+        handler.on_modified(FileModifiedEvent("/vault/note.md"))
+
+        callback.assert_called_once_with("/vault/note.md", "modified")
+        assert isinstance(callback.call_args[0][0], str)
+
+    def test_ignored_path_not_forwarded(self, handler, callback):
+        """Test that paths matching an ignore pattern are dropped."""
+        with patch.object(handler, 'ignored_patterns', [".obsidian/"]):
+            handler.on_modified(FileModifiedEvent("/vault/.obsidian/workspace.md"))
+
+        callback.assert_not_called()
+
+    def test_move_out_of_ignored_folder_creates_note(self, handler, callback):
+        """Test that a note moved out of an ignored folder is treated as new."""
+        with patch.object(handler, 'ignored_patterns', ["/templates/"]):
+            handler.on_moved(FileMovedEvent("/vault/templates/a.md", "/vault/a.md"))
+
+        callback.assert_called_once_with("/vault/a.md", "created")
+
+
+class TestEventDispatch:
+    """Test cases for routing events to their processing methods."""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Create a FileWatcherService that runs work inline."""
+        service = FileWatcherService(
+            vault_path=str(tmp_path),
+            entity_detection_service=Mock(),
+            knowledge_graph_service=Mock()
+        )
+        service._submit = lambda key, fn, *args: fn(*args)
+        service._read_note_file = Mock(return_value=None)
+        yield service
+        service._pool.shutdown(wait=True)
+
+    def test_move_rekeys_existing_note(self, service):
+        """Test that a move keeps the node and refreshes it from the new path."""
+        service._handle_file_change("/vault/old.md", "moved", "/vault/new.md")
+
+        service.kg_service.move_note.assert_called_once_with(
+            "/vault/old.md", "/vault/new.md")
+        service.kg_service.delete_note.assert_not_called()
+        service._read_note_file.assert_called_once_with("/vault/new.md")
+
+    def test_unknown_event_type_is_ignored(self, service):
+        """Test that unknown event types do nothing."""
+        service._handle_file_change("/vault/a.md", "unknown")
+
+        service.kg_service.delete_note.assert_not_called()
+        service._read_note_file.assert_not_called()
+
+    @pytest.mark.parametrize("src, dest, expected", [
+        ("/vault/a.md", "/vault/b.md", ("/vault/a.md", "moved", "/vault/b.md")),
+        ("/vault/a.md", "/vault/a.txt", ("/vault/a.md", "deleted")),
+        ("/vault/a.txt", "/vault/a.md", ("/vault/a.md", "created")),
+    ])
+    def test_handler_move_events(self, src, dest, expected):
+        """Test how the handler translates move events."""
+        callback = Mock()
+        handler = ObsidianFileHandler(Path("/vault"), callback)
+
+        handler.on_moved(FileMovedEvent(src, dest))
+
+        callback.assert_called_once_with(*expected)
+
+
+class TestUnchangedContent:
+    """Test cases for skipping work when a note's text did not change."""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Create a FileWatcherService reading a fixed note."""
+        service = FileWatcherService(
+            vault_path=str(tmp_path),
+            entity_detection_service=Mock(),
+            knowledge_graph_service=Mock()
+        )
+        service._read_note_file = Mock(return_value=Note(
+            title="AI", content="About AI", file_path="/vault/ai.md"))
+        yield service
+        service._pool.shutdown(wait=True)
+
+    def test_unchanged_content_only_refreshes_metadata(self, service):
+        """Test that an unchanged note skips detection and embedding."""
+        service.kg_service.get_note_content_hash.return_value = EmbeddingCache.content_hash("About AI")
+
+        service._process_note_update("/vault/ai.md")
+
+        service.kg_service.create_note_node.assert_called_once()
+        service.entity_detection_service.detect_entities.assert_not_called()
+        service.kg_service.update_note_embeddings.assert_not_called()
+
+    def test_note_without_stored_hash_is_re_embedded(self, service):
+        """Test that same content saved again after a failed embedding is re-embedded."""
+        # The hash is only stored alongside a successful embedding
+        service.kg_service.get_note_content_hash.return_value = None
+
+        service._process_note_update("/vault/ai.md")
+
+        service.entity_detection_service.detect_entities.assert_called_once()
+        service.kg_service.update_note_embeddings.assert_called_once()
+
+    def test_changed_content_is_processed(self, service):
+        """Test that a note whose text changed is detected and embedded."""
+        service.kg_service.get_note_content_hash.return_value = EmbeddingCache.content_hash("Old text")
+
+        service._process_note_update("/vault/ai.md")
+
+        service.entity_detection_service.detect_entities.assert_called_once()
+        service.kg_service.update_note_embeddings.assert_called_once()
@@ -1,11 +1,15 @@
 """Tests for the KnowledgeGraphService."""
 
+import threading
+
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from neo4j import GraphDatabase
-from neo4j.exceptions import ServiceUnavailable
+from neo4j import GraphDatabase, Record
+from neo4j.exceptions import ClientError, ServiceUnavailable
 
+from graphrag.services.embedding_cache import EmbeddingCache
 from graphrag.services.knowledge_graph import KnowledgeGraphService
+from graphrag.services.openai_http import shared_http_client
 from graphrag.models import Note, Entity, Relationship, EntityType, RelationshipType
 from graphrag.config import Config
 
@@ -13,22 +17,6 @@ from graphrag.config import Config
 class TestKnowledgeGraphService:
     """Test cases for KnowledgeGraphService."""
 
-    @pytest.fixture
-    def mock_config(self):
-        """Mock configuration for testing."""
-        config = Mock(spec=Config)
-        config.neo4j_uri = "bolt://localhost:7687"
-        config.neo4j_user = "neo4j"
-        config.neo4j_password = "password"
-        config.neo4j_database = "neo4j"
-        config.neo4j_index_name = "test-index"
-        config.neo4j_embedding_index_name = "test-embedding-index"
-        config.openai_api_key = "test-key"
-        config.openai_org_id = "test-org"
-        config.openai_embedding_model = "text-embedding-ada-002"
-        config.graph_rag_context_window = 20
-        return config
-
     @pytest.fixture
     def mock_neo4j_driver(self):
         """Mock Neo4j driver for testing."""
@@ -351,4 +339,524 @@ class TestKnowledgeGraphService:
         
         assert len(entities) == 1
         assert entities[0]["name"] == "Artificial Intelligence"
-        assert entities[0]["type"] == "Concept" 
\ No newline at end of file
+        assert entities[0]["type"] == "Concept" 
+
+
+@pytest.fixture
+def kg_driver():
+    """Mock Neo4j driver whose sessions support the context manager protocol."""
+    return MagicMock()
+
+
+@pytest.fixture
+def kg_service(kg_driver):
+    """Create a KnowledgeGraphService backed by mocks."""
+    with patch('graphrag.services.knowledge_graph.GraphDatabase') as mock_graph_db, \
+         patch('graphrag.services.knowledge_graph.OpenAIEmbeddings'), \
+         patch('graphrag.services.knowledge_graph.HybridCypherRetriever'), \
+         patch.object(Config, 'EMBEDDING_CACHE_PATH', ':memory:'):
+        mock_graph_db.driver.return_value = kg_driver
+        service = KnowledgeGraphService()
+
+    service.embedder.client.embeddings.create.side_effect = lambda input, model: Mock(
+        data=[Mock(embedding=[float(i)]) for i in range(len(input))])
+    kg_driver.session.return_value.__enter__.return_value.run.reset_mock()
+    yield service
+    service.close()
+
+
+class TestNoteEmbeddingBatching:
+    """Test cases for batched note embedding updates."""
+
+    @staticmethod
+    def _note(i):
+        return Note(title=f"Note {i}", content=f"Content {i}", file_path=f"/tmp/note-{i}.md")
+
+    def test_updates_are_queued_until_flush(self, kg_service):
+        """Test that queued notes are not embedded immediately."""
+        kg_service.update_note_embeddings(self._note(1))
+        kg_service.update_note_embeddings(self._note(2))
+
+        kg_service.embedder.client.embeddings.create.assert_not_called()
+        assert len(kg_service._embed_queue) == 2
+
+    def test_flush_embeds_batch_in_one_request(self, kg_service, kg_driver):
+        """Test that a flush issues one embeddings request and one UNWIND write."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+
+        for i in range(3):
+            kg_service.update_note_embeddings(self._note(i))
+        kg_service.flush_note_embeddings()
+
+        kg_service.embedder.client.embeddings.create.assert_called_once()
+        assert kg_service.embedder.client.embeddings.create.call_args.kwargs["input"] == [
+            "Content 0", "Content 1", "Content 2"]
+        mock_session.run.assert_called_once()
+        assert "UNWIND $rows" in mock_session.run.call_args[0][0]
+        rows = mock_session.run.call_args.kwargs["rows"]
+        assert [row["file_path"] for row in rows] == [
+            "/tmp/note-0.md", "/tmp/note-1.md", "/tmp/note-2.md"]
+        assert kg_service._embed_queue == []
+
+    def test_embeddings_stored_as_float32_vectors(self, kg_service, kg_driver):
+        """Test that embeddings are written with the compact vector procedure."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+
+        kg_service.update_note_embeddings(self._note(1))
+        kg_service.flush_note_embeddings()
+
+        query = mock_session.run.call_args[0][0]
+        assert "db.create.setNodeVectorProperty(n, 'content_embedding'" in query
+        assert "SET n.content_embedding" not in query
+
+    def test_full_batch_flushes_in_background(self, kg_service):
+        """Test that reaching the batch size triggers a background flush."""
+        with patch.object(Config, 'EMBEDDING_BATCH_SIZE', 2):
+            kg_service.update_note_embeddings(self._note(1))
+            kg_service.update_note_embeddings(self._note(2))
+        kg_service._embed_pool.shutdown(wait=True)
+
+        kg_service.embedder.client.embeddings.create.assert_called_once()
+        assert kg_service._embed_queue == []
+
+    def test_flush_with_empty_queue_is_noop(self, kg_service):
+        """Test that flushing without pending notes does nothing."""
+        kg_service.flush_note_embeddings()
+
+        kg_service.embedder.client.embeddings.create.assert_not_called()
+
+    def test_cached_content_is_not_re_embedded(self, kg_service):
+        """Test that unchanged content reuses the cached embedding."""
+        kg_service.update_note_embeddings(self._note(1))
+        kg_service.flush_note_embeddings()
+        kg_service.update_note_embeddings(self._note(1))
+        kg_service.update_note_embeddings(self._note(2))
+        kg_service.flush_note_embeddings()
+
+        calls = kg_service.embedder.client.embeddings.create.call_args_list
+        assert len(calls) == 2
+        assert calls[1].kwargs["input"] == ["Content 2"]
+
+    def test_content_hash_written_with_embedding(self, kg_service, kg_driver):
+        """Test that the content hash is stored in the same statement as the vector."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+
+        kg_service.update_note_embeddings(self._note(1))
+        kg_service.flush_note_embeddings()
+
+        query = mock_session.run.call_args[0][0]
+        assert "SET n.content_hash = row.content_hash" in query
+        assert mock_session.run.call_args.kwargs["rows"][0]["content_hash"] == (
+            EmbeddingCache.content_hash("Content 1"))
+
+    def test_failed_embedding_leaves_content_hash_unset(self, kg_service, kg_driver):
+        """Test that a note whose embedding failed still looks changed."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        kg_service.embedder.client.embeddings.create.side_effect = Exception("rate limited")
+
+        kg_service.create_note_node(self._note(1))
+        kg_service.update_note_embeddings(self._note(1))
+        kg_service.flush_note_embeddings()
+
+        statements = [c.args[0] for c in mock_session.run.call_args_list]
+        assert not any("content_hash" in q for q in statements)
+
+    def test_concurrent_flushes_write_in_queue_order(self, kg_service, kg_driver):
+        """Test that a later flush waits for an earlier one still embedding."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        started = threading.Event()
+        release = threading.Event()
+
+        def create(input, model):
+            if input == ["v1"]:
+                started.set()
+                release.wait()
+            return Mock(data=[Mock(embedding=[float(len(text))]) for text in input])
+
+        kg_service.embedder.client.embeddings.create.side_effect = create
+        kg_service.update_note_embeddings(Note(title="N", content="v1", file_path="/tmp/n.md"))
+        first = threading.Thread(target=kg_service.flush_note_embeddings)
+        first.start()
+        started.wait()
+
+        kg_service.update_note_embeddings(Note(title="N", content="v2 longer", file_path="/tmp/n.md"))
+        second = threading.Thread(target=kg_service.flush_note_embeddings)
+        second.start()
+        second.join(timeout=0.1)
+        writes_while_embedding = mock_session.run.call_count
+
+        release.set()
+        first.join()
+        second.join()
+
+        assert writes_while_embedding == 0
+
+        written = [c.kwargs["rows"][0]["embedding"] for c in mock_session.run.call_args_list]
+        assert written == [[2.0], [9.0]]
+
+    def test_large_flush_is_split_into_batches(self, kg_service):
+        """Test that a flush sends at most EMBEDDING_BATCH_SIZE texts per request."""
+        kg_service._embed_queue = [(f"/tmp/note-{i}.md", f"Content {i}") for i in range(5)]
+        with patch.object(Config, 'EMBEDDING_BATCH_SIZE', 2):
+            kg_service.flush_note_embeddings()
+
+        calls = kg_service.embedder.client.embeddings.create.call_args_list
+        assert [len(c.kwargs["input"]) for c in calls] == [2, 2, 1]
+
+    def test_failed_batch_is_retried_per_note(self, kg_service, kg_driver):
+        """Test that one rejected note does not drop the rest of its batch."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+
+        def create(input, model):
+            if "Content 1" in input:
+                raise Exception("maximum context length exceeded")
+            return Mock(data=[Mock(embedding=[1.0]) for _ in input])
+
+        kg_service.embedder.client.embeddings.create.side_effect = create
+        for i in range(3):
+            kg_service.update_note_embeddings(self._note(i))
+        kg_service.flush_note_embeddings()
+
+        rows = mock_session.run.call_args.kwargs["rows"]
+        assert [row["file_path"] for row in rows] == ["/tmp/note-0.md", "/tmp/note-2.md"]
+        assert kg_service.embedding_cache.get(EmbeddingCache.content_hash("Content 1")) is None
+
+    def test_close_flushes_pending_embeddings(self, kg_service, kg_driver):
+        """Test that closing the service writes queued embeddings first."""
+        kg_service.update_note_embeddings(self._note(1))
+
+        kg_service.close()
+
+        kg_service.embedder.client.embeddings.create.assert_called_once()
+        kg_driver.close.assert_called_once()
+
+
+class TestEmbedderHttpClient:
+    """Test cases for the embedder's HTTP connection pool."""
+
+    def test_embedder_shares_pooled_http_client(self, kg_driver):
+        """Test that note embeddings reuse the process-wide HTTP pool."""
+        with patch('graphrag.services.knowledge_graph.GraphDatabase') as mock_graph_db, \
+             patch('graphrag.services.knowledge_graph.OpenAIEmbeddings') as mock_embeddings, \
+             patch('graphrag.services.knowledge_graph.HybridCypherRetriever'), \
+             patch.object(Config, 'EMBEDDING_CACHE_PATH', ':memory:'):
+            mock_graph_db.driver.return_value = kg_driver
+            service = KnowledgeGraphService()
+
+        assert mock_embeddings.call_args.kwargs["http_client"] is shared_http_client()
+        service.close()
+
+
+class TestIndexesAndRetrieval:
+    """Test cases for index creation and the hybrid retrieval query."""
+
+    def test_ensure_indexes(self, kg_service, kg_driver):
+        """Test that native index DDL is issued for every index."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+
+        kg_service._ensure_indexes()
+
+        statements = [c.args[0] for c in mock_session.run.call_args_list]
+        assert any("CREATE VECTOR INDEX" in q for q in statements)
+        assert any("CREATE FULLTEXT INDEX" in q for q in statements)
+        assert any("note_last_modified" in q for q in statements)
+
+    def test_retrieval_query_expands_search_hits(self, kg_service):
+        """Test that the retrieval query starts from the search hits."""
+        query = kg_service._get_retrieval_query()
+
+        assert query.strip().startswith("WITH node AS note, score")
+        assert "MATCH (note:Note)" not in query
+
+    def test_search_records_are_formatted_as_dicts(self, kg_service):
+        """Test that search results carry record data rather than its repr."""
+        record = Record({"hit": {"note_title": "AI", "note_path": "ai.md"}})
+
+        item = kg_service._format_search_record(record)
+
+        assert item.content == {"note_title": "AI", "note_path": "ai.md"}
+
+    def test_retrieval_query_returns_summary(self, kg_service):
+        """Test that retrieval ships the note summary rather than full content."""
+        query = kg_service._get_retrieval_query()
+
+        assert "note.summary" in query
+        assert "note_content: note.content" not in query
+
+    def test_note_properties_include_summary_but_not_hash(self, kg_service):
+        """Test that note writes carry a bounded summary and leave the hash to embedding."""
+        note = Note(title="Long", content="x" * 50, file_path="/tmp/long.md")
+
+        with patch.object(Config, 'NOTE_SUMMARY_LENGTH', 10):
+            properties = kg_service._note_properties(note)
+
+        assert properties["summary"] == "x" * 10
+        assert "content_hash" not in properties
+
+
+class TestBulkUpsertNotes:
+    """Test cases for batched note upserts."""
+
+    def test_notes_written_in_batches(self, kg_service, kg_driver):
+        """Test that notes are sent as UNWIND batches of the configured size."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        notes = [
+            Note(title=f"Note {i}", content=f"Content {i}", file_path=f"/tmp/note-{i}.md")
+            for i in range(5)
+        ]
+
+        with patch.object(Config, 'NOTE_UPSERT_BATCH_SIZE', 2):
+            assert kg_service.bulk_upsert_notes(notes) == 5
+
+        assert mock_session.run.call_count == 3
+        batches = [c.kwargs["rows"] for c in mock_session.run.call_args_list]
+        assert [len(rows) for rows in batches] == [2, 2, 1]
+        assert "UNWIND $rows" in mock_session.run.call_args[0][0]
+        assert batches[0][0]["file_path"] == "/tmp/note-0.md"
+        assert batches[0][0]["content"] == "Content 0"
+
+    def test_notes_within_batch_size_sent_in_one_run(self, kg_service, kg_driver):
+        """Test that a batch below the size limit is a single run carrying every row."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        notes = [
+            Note(title=f"Note {i}", content=f"Content {i}", file_path=f"/tmp/note-{i}.md")
+            for i in range(3)
+        ]
+
+        kg_service.bulk_upsert_notes(notes)
+
+        mock_session.run.assert_called_once()
+        assert "UNWIND $rows" in mock_session.run.call_args[0][0]
+        rows = mock_session.run.call_args.kwargs["rows"]
+        assert [row["file_path"] for row in rows] == [note.file_path for note in notes]
+
+
+class TestMoveNote:
+    """Test cases for moving notes between paths."""
+
+    def test_move_note_rekeys_node(self, kg_service, kg_driver):
+        """Test that moving a note updates its file_path in place."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+
+        kg_service.move_note("/vault/old.md", "/vault/new.md")
+
+        mock_session.run.assert_called_once()
+        assert "SET n.file_path = $new_path" in mock_session.run.call_args[0][0]
+        assert mock_session.run.call_args.kwargs == {
+            "old_path": "/vault/old.md", "new_path": "/vault/new.md"}
+
+
+class TestGraphGeneration:
+    """Test cases for the counter of graph changes."""
+
+    def test_writes_bump_generation(self, kg_service):
+        """Test that every write path advances the generation."""
+        sample_note = Note(title="Note", content="Text", file_path="/vault/note.md")
+        writes = [
+            lambda: kg_service.create_note_node(sample_note),
+            lambda: kg_service.bulk_upsert_notes([sample_note]),
+            lambda: kg_service.write_note_graph(sample_note, [], []),
+            lambda: kg_service.delete_note(sample_note.file_path),
+            lambda: kg_service.move_note(sample_note.file_path, "/vault/moved.md"),
+        ]
+        for write in writes:
+            before = kg_service.generation
+            write()
+            assert kg_service.generation > before
+
+    def test_reads_keep_generation(self, kg_service):
+        """Test that reads leave the generation unchanged."""
+        kg_service.get_note_content_hash("/vault/note.md")
+
+        assert kg_service.generation == 0
+
+
+class TestNoteContentHash:
+    """Test cases for reading a note's stored content hash."""
+
+    def test_hash_read_without_the_node(self, kg_service, kg_driver):
+        """Test that only the hash property is returned, not the whole node."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        mock_session.run.return_value.single.return_value = {"content_hash": "abc"}
+
+        assert kg_service.get_note_content_hash("/vault/a.md") == "abc"
+        assert "RETURN n.content_hash" in mock_session.run.call_args[0][0]
+
+    def test_missing_note_has_no_hash(self, kg_service, kg_driver):
+        """Test that a note not in the graph has no hash."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        mock_session.run.return_value.single.return_value = None
+
+        assert kg_service.get_note_content_hash("/vault/a.md") is None
+
+
+class TestLinkNoteToEntities:
+    """Test cases for linking notes to the entities they contain."""
+
+    def test_entities_linked_in_one_query(self, kg_service, kg_driver):
+        """Test that every entity is linked with a single UNWIND query."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+
+        kg_service.link_note_to_entities("/vault/a.md", ["AI", "Python"])
+
+        mock_session.run.assert_called_once()
+        assert "UNWIND $entity_names" in mock_session.run.call_args[0][0]
+        assert mock_session.run.call_args.kwargs == {
+            "note_path": "/vault/a.md", "entity_names": ["AI", "Python"]}
+
+    def test_no_entities_skips_query(self, kg_service, kg_driver):
+        """Test that a note without entities costs no round-trip."""
+        kg_service.link_note_to_entities("/vault/a.md", [])
+
+        kg_driver.session.return_value.__enter__.return_value.run.assert_not_called()
+
+
+class TestWriteNoteGraph:
+    """Test cases for writing a note's graph in one transaction."""
+
+    @pytest.fixture
+    def tx(self, kg_driver):
+        """Transaction passed to the write function by execute_write."""
+        tx = Mock()
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        mock_session.execute_write.side_effect = lambda fn, *args: fn(tx, *args)
+        return tx
+
+    def test_note_graph_written_in_one_transaction(self, kg_service, kg_driver, tx):
+        """Test that the note, entities, links and relationships share a transaction."""
+        note = Note(title="AI", content="About AI", file_path="/vault/ai.md")
+        ai = Entity(name="AI", entity_type=EntityType.CONCEPT, confidence=0.9)
+        python = Entity(name="Python", entity_type=EntityType.TOPIC, confidence=0.9)
+        related = Relationship(source_entity_id=ai.id, target_entity_id=python.id,
+                               relationship_type=RelationshipType.RELATED_TO, confidence=0.8)
+        dangling = Relationship(source_entity_id=ai.id, target_entity_id=note.id,
+                                relationship_type=RelationshipType.MENTIONS, confidence=0.8)
+
+        kg_service.write_note_graph(note, [ai, python], [related, dangling])
+
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        mock_session.execute_write.assert_called_once()
+        mock_session.run.assert_not_called()
+
+        queries = [c[0][0] for c in tx.run.call_args_list]
+        assert len(queries) == 5
+        assert "MERGE (n:Note" in queries[0]
+        assert all("MERGE (e:Entity" in q for q in queries[1:3])
+        assert "CONTAINS_ENTITY" in queries[3]
+        assert tx.run.call_args_list[3].kwargs["entity_names"] == ["AI", "Python"]
+        assert tx.run.call_args_list[4].kwargs["source_name"] == "AI"
+        assert tx.run.call_args_list[4].kwargs["target_name"] == "Python"
+
+    def test_relationship_type_is_part_of_the_query(self, kg_service, tx):
+        """Test that the relationship type is written into the MERGE, not passed as a parameter."""
+        ai = Entity(name="AI", entity_type=EntityType.CONCEPT, confidence=0.9)
+        python = Entity(name="Python", entity_type=EntityType.TOPIC, confidence=0.9)
+        part_of = Relationship(source_entity_id=python.id, target_entity_id=ai.id,
+                               relationship_type=RelationshipType.PART_OF, confidence=0.8)
+
+        kg_service.write_note_graph(
+            Note(title="AI", content="About AI", file_path="/vault/ai.md"),
+            [ai, python], [part_of], create_note=False)
+
+        query = tx.run.call_args[0][0]
+        assert "MERGE (source)-[r:PART_OF]->(target)" in query
+        assert "relationship_type" not in tx.run.call_args.kwargs
+
+    def test_existing_note_node_is_not_rewritten(self, kg_service, tx):
+        """Test that create_note=False leaves the note node to the bulk upsert."""
+        note = Note(title="AI", content="About AI", file_path="/vault/ai.md")
+
+        kg_service.write_note_graph(note, [], [], create_note=False)
+
+        tx.run.assert_not_called()
+
+
+class TestLocalVectorIndex:
+    """Test cases for searching through the in-process vector index."""
+
+    @pytest.fixture
+    def local_kg_service(self, kg_driver):
+        """Create a KnowledgeGraphService with the local index enabled."""
+        with patch.object(Config, 'LOCAL_VECTOR_INDEX', True), \
+             patch.object(Config, 'EMBEDDING_DIMENSIONS', 2):
+            with patch('graphrag.services.knowledge_graph.GraphDatabase') as mock_graph_db, \
+                 patch('graphrag.services.knowledge_graph.OpenAIEmbeddings'), \
+                 patch('graphrag.services.knowledge_graph.HybridCypherRetriever'), \
+                 patch.object(Config, 'EMBEDDING_CACHE_PATH', ':memory:'):
+                mock_graph_db.driver.return_value = kg_driver
+                service = KnowledgeGraphService()
+
+        kg_driver.session.return_value.__enter__.return_value.run.reset_mock()
+        yield service
+        service.close()
+
+    def test_search_loads_index_once_and_expands_hits(self, local_kg_service, kg_driver):
+        """Test that searches rank locally and only fetch the hits from Neo4j."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        mock_session.run.side_effect = [
+            [{"file_path": "ai.md", "embedding": [1.0, 0.0]},
+             {"file_path": "food.md", "embedding": [0.0, 1.0]}],
+            [Record({"hit": {"note_title": "AI", "note_path": "ai.md"}})],
+            [],
+        ]
+
+        items = local_kg_service.search_notes("What is AI?", 1, query_vector=[1.0, 0.1])
+        local_kg_service.search_notes("What is AI?", 1, query_vector=[1.0, 0.1])
+
+        assert [item.content for item in items] == [{"note_title": "AI", "note_path": "ai.md"}]
+        assert mock_session.run.call_count == 3
+        assert mock_session.run.call_args_list[1].kwargs["hits"][0]["file_path"] == "ai.md"
+        local_kg_service.retriever.search.assert_not_called()
+
+    def test_embedding_flush_updates_index(self, local_kg_service):
+        """Test that newly embedded notes become searchable locally."""
+        local_kg_service.embedder.client.embeddings.create.side_effect = lambda input, model: Mock(
+            data=[Mock(embedding=[1.0, 0.0]) for _ in input])
+
+        local_kg_service.update_note_embeddings(
+            Note(title="AI", content="About AI", file_path="/tmp/ai.md"))
+        local_kg_service.flush_note_embeddings()
+
+        assert "/tmp/ai.md" in local_kg_service.vector_index
+
+    def test_delete_and_move_update_index(self, local_kg_service):
+        """Test that graph edits are mirrored in the local index."""
+        local_kg_service.vector_index.upsert_many({"a.md": [1.0, 0.0], "b.md": [0.0, 1.0]})
+
+        local_kg_service.delete_note("a.md")
+        local_kg_service.move_note("b.md", "c.md")
+
+        assert "a.md" not in local_kg_service.vector_index
+        assert "c.md" in local_kg_service.vector_index
+
+
+class TestGraphStats:
+    """Test cases for graph statistics."""
+
+    def test_stats_from_apoc_meta(self, kg_service, kg_driver):
+        """Test that counts come from a single apoc.meta.stats call."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        mock_session.run.return_value.single.return_value = {
+            "labels": {"Note": 3, "Entity": 5},
+            "relTypesCount": {"CONTAINS_ENTITY": 7},
+        }
+
+        stats = kg_service.get_graph_stats()
+
+        assert stats == {"Note_count": 3, "Entity_count": 5, "CONTAINS_ENTITY_count": 7}
+        mock_session.run.assert_called_once()
+        assert "apoc.meta.stats" in mock_session.run.call_args[0][0]
+
+    def test_stats_fall_back_to_scan_without_apoc(self, kg_service, kg_driver):
+        """Test that a missing APOC procedure falls back to counting scans."""
+        mock_session = kg_driver.session.return_value.__enter__.return_value
+        mock_session.run.side_effect = [
+            ClientError("There is no procedure with the name `apoc.meta.stats`"),
+            [{"name": "Note", "count": 2}, {"name": "CONTAINS_ENTITY", "count": 4}],
+        ]
+
+        stats = kg_service.get_graph_stats()
+
+        assert stats == {"Note_count": 2, "CONTAINS_ENTITY_count": 4}
+        assert mock_session.run.call_count == 2
+        assert "UNION ALL" in mock_session.run.call_args[0][0]
@@ -1,38 +1,86 @@
 """Tests for the QueryService."""
 
+import asyncio
 import json
+import threading
+from datetime import datetime, timezone
+import numpy as np
 import pytest
-from unittest.mock import Mock, patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 from openai import OpenAI
 
-from graphrag.services.query import QueryService
+from graphrag.services.answer_cache import AnswerCache
+from graphrag.services.query import (
+    ANSWER_PROMPT_PARTS, ANSWER_PROMPT_TEMPLATE, NO_CONTEXT_ANSWER, TOPIC_SUMMARY_PROMPT_PARTS,
+    TOPIC_SUMMARY_PROMPT_TEMPLATE, QueryService, get_query_service, shared_http_client)
+from graphrag.services.semantic_cache import SemanticCache
 from graphrag.models import QueryResult, Note
 from graphrag.config import Config
 
 
+# (method, args, kwargs, generated response) for the answering entry points
+ANSWER_CASES = [
+    pytest.param("query", ("What is AI?",), {}, "AI is artificial intelligence.",
+                 id="query"),
+    pytest.param("query", ("What is AI? (with examples)",), {},
+                 "AI is artificial intelligence.", id="query-special-characters"),
+    pytest.param("chat_query", ("How does it relate to machine learning?",),
+                 {"conversation_history": [{"role": "user", "content": "What is AI?"}]},
+                 "ML is a subset of AI.", id="chat_query"),
+    pytest.param("get_topic_summary", ("artificial intelligence",), {},
+                 "AI and ML are computer science fields.", id="get_topic_summary"),
+]
+
+def completion(text):
+    """Chat completion response carrying the given message text."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+def set_openai_reply(client, text):
+    """Make the client's chat completions return the given text."""
+    client.chat.completions.create.return_value = completion(text)
+
+
+@pytest.fixture(scope="module")
+def openai_class():
+    """Patch the OpenAI client class once for the whole module."""
+    with patch('graphrag.services.query.OpenAI') as mock_openai:
+        yield mock_openai
+
+
+@pytest.fixture(autouse=True)
+def reset_openai_class(openai_class):
+    """Give each test a fresh client from the module-wide patch."""
+    yield
+    openai_class.reset_mock(return_value=True, side_effect=True)
+
+
 class TestQueryService:
     """Test cases for QueryService."""
 
-    @pytest.fixture
-    def mock_config(self):
-        """Mock configuration for testing."""
-        config = Mock(spec=Config)
-        config.openai_api_key = "test-key"
-        config.openai_org_id = "test-org"
-        config.openai_query_model = "gpt-4o"
-        config.graph_rag_context_window = 20
-        return config
-
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def mock_knowledge_graph_service(self):
-        """Mock KnowledgeGraphService for testing."""
+        """Mock KnowledgeGraphService shared by the class."""
         return Mock()
 
-    @pytest.fixture
+    @pytest.fixture(scope="class")
     def mock_openai_client(self):
-        """Mock OpenAI client for testing."""
-        mock_client = Mock(spec=OpenAI)
-        return mock_client
+        """Mock OpenAI client shared by the class."""
+        return Mock(spec=OpenAI)
+
+    @pytest.fixture(scope="class", autouse=True)
+    def patch_openai(self, mock_openai_client):
+        """Hand the shared mock client to every QueryService in the class."""
+        with patch('graphrag.services.query.OpenAI', return_value=mock_openai_client):
+            yield
+
+    @pytest.fixture(autouse=True)
+    def reset_mocks(self, mock_knowledge_graph_service, mock_openai_client):
+        """Clear calls and configured results left by the previous test."""
+        yield
+        mock_knowledge_graph_service.reset_mock(return_value=True, side_effect=True)
+        mock_openai_client.reset_mock(return_value=True, side_effect=True)
 
     @pytest.fixture
     def query_service(self, mock_knowledge_graph_service):
@@ -41,22 +89,20 @@ class TestQueryService:
 
     def test_service_initialization(self, mock_config, mock_knowledge_graph_service):
         """Test that the service initializes correctly."""
-        with patch('graphrag.services.query.OpenAI') as mock_openai:
-            service = QueryService(mock_knowledge_graph_service)
-            assert service.kg_service == mock_knowledge_graph_service
+        service = QueryService(mock_knowledge_graph_service)
+        assert service.kg_service == mock_knowledge_graph_service
 
     def test_query_success(self, query_service, mock_knowledge_graph_service, mock_openai_client):
         """Test successful query processing."""
         question = "What is artificial intelligence?"
-        mock_notes = [Mock(), Mock()]
+        mock_notes = [object(), object()]
         mock_knowledge_graph_service.search_notes.return_value = mock_notes
         
-        with patch('graphrag.services.query.OpenAI', return_value=mock_openai_client):
-            result = query_service.query(question)
-            
-            assert result.answer is not None
-            assert result.context_notes == mock_notes
-            assert result.confidence > 0
+        result = query_service.query(question)
+        
+        assert result.answer is not None
+        assert result.context_notes == mock_notes
+        assert result.confidence > 0
 
     def test_query_with_no_retrieved_notes(self, query_service, mock_knowledge_graph_service):
         """Test query processing when no relevant notes are found."""
@@ -72,21 +118,54 @@ class TestQueryService:
     def test_query_openai_error(self, query_service, mock_knowledge_graph_service, mock_openai_client):
         """Test query processing when OpenAI API fails."""
         question = "What is machine learning?"
-        mock_knowledge_graph_service.search_notes.return_value = [Mock()]
+        mock_knowledge_graph_service.search_notes.return_value = [object()]
         
-        with patch('graphrag.services.query.OpenAI', return_value=mock_openai_client):
-            mock_openai_client.chat.completions.create.side_effect = Exception("API Error")
-            
-            result = query_service.query(question)
-            
-            assert "error" in result.answer.lower()
-            assert result.confidence == 0.0
+        mock_openai_client.chat.completions.create.side_effect = Exception("API Error")
+        
+        result = query_service.query(question)
+        
+        assert "error" in result.answer.lower()
+        assert result.confidence == 0.0
+
+    @pytest.fixture
+    def answering(self, mock_knowledge_graph_service, mock_openai_client):
+        """Have the mocks retrieve one note and answer with the given text."""
+        def answer_with(text):
+            mock_knowledge_graph_service.embed_query.return_value = [1.0, 0.0]
+            mock_knowledge_graph_service.search_notes.return_value = [Mock(content={
+                'note_path': 'ai.md',
+                'note_title': 'AI Note',
+                'note_content': 'Content about AI',
+            })]
+            set_openai_reply(mock_openai_client, text)
+        return answer_with
+
+    @pytest.mark.parametrize("method, args, kwargs, response", ANSWER_CASES)
+    def test_method_returns_generated_answer(self, query_service, answering,
+                                             method, args, kwargs, response):
+        """Test that each answering method returns the generated text."""
+        answering(response)
+
+        result = getattr(query_service, method)(*args, **kwargs)
+
+        answer = result if isinstance(result, str) else result.answer
+        assert response in answer
+
+    def test_query_with_custom_context_size(self, query_service, answering,
+                                            mock_knowledge_graph_service):
+        """Test that a custom context size is passed through to retrieval."""
+        answering("AI is artificial intelligence.")
+
+        query_service.query("What is AI?", 5)
+
+        mock_knowledge_graph_service.search_notes.assert_called_once_with(
+            "What is AI?", 5, query_vector=[1.0, 0.0])
 
     def test_build_context_from_notes(self, query_service):
         """Test that context is built correctly from notes."""
         mock_notes = [
-            Mock(content="Content about AI"),
-            Mock(content="Content about ML")
+            SimpleNamespace(title="", file_path="ai.md", content="Content about AI"),
+            SimpleNamespace(title="", file_path="ml.md", content="Content about ML")
         ]
         
         context = query_service._prepare_context_for_llm(mock_notes)
@@ -97,8 +176,8 @@ class TestQueryService:
     def test_build_context_with_metadata(self, query_service):
         """Test that context includes note metadata."""
         mock_notes = [
-            Mock(title="AI Note", content="Content about AI"),
-            Mock(title="ML Note", content="Content about ML")
+            SimpleNamespace(title="AI Note", file_path="ai.md", content="Content about AI"),
+            SimpleNamespace(title="ML Note", file_path="ml.md", content="Content about ML")
         ]
         
         context = query_service._prepare_context_for_llm(mock_notes)
@@ -122,11 +201,9 @@ class TestQueryService:
 
     def test_extract_citations_success(self, service, mock_openai_client):
         """Test that citations are extracted successfully."""
-        mock_response = Mock()
-        mock_response.choices[0].message.content = json.dumps({
+        set_openai_reply(mock_openai_client, json.dumps({
             "citations": ["note-1", "note-2"]
-        })
-        mock_openai_client.chat.completions.create.return_value = mock_response
+        }))
         
         citations = service._extract_citations("AI is a field of computer science.")
         
@@ -134,9 +211,7 @@ class TestQueryService:
 
     def test_extract_citations_invalid_json(self, service, mock_openai_client):
         """Test that citation extraction handles invalid JSON gracefully."""
-        mock_response = Mock()
-        mock_response.choices[0].message.content = "Invalid JSON"
-        mock_openai_client.chat.completions.create.return_value = mock_response
+        set_openai_reply(mock_openai_client, "Invalid JSON")
         
         citations = service._extract_citations("AI is a field of computer science.")
         
@@ -150,20 +225,6 @@ class TestQueryService:
         
         assert citations == []
 
-    def test_chat_mode_success(self, service, mock_knowledge_graph_service, mock_openai_client):
-        """Test that chat mode works correctly."""
-        mock_notes = [{"id": "note-1", "title": "AI Note", "content": "Content about AI"}]
-        mock_knowledge_graph_service.hybrid_search.return_value = mock_notes
-        
-        mock_response = Mock()
-        mock_response.choices[0].message.content = "AI is artificial intelligence."
-        mock_openai_client.chat.completions.create.return_value = mock_response
-        
-        result = service.chat("What is AI?")
-        
-        assert isinstance(result, QueryResult)
-        assert "AI is artificial intelligence" in result.answer
-
     def test_find_similar_entities_success(self, service, mock_knowledge_graph_service, mock_openai_client):
         """Test that finding similar entities works correctly."""
         mock_entities = [
@@ -172,9 +233,7 @@ class TestQueryService:
         ]
         mock_knowledge_graph_service.search_entities.return_value = mock_entities
         
-        mock_response = Mock()
-        mock_response.choices[0].message.content = "Machine Learning and Deep Learning are similar to AI."
-        mock_openai_client.chat.completions.create.return_value = mock_response
+        set_openai_reply(mock_openai_client, "Machine Learning and Deep Learning are similar to AI.")
         
         result = service.find_similar_entities("Artificial Intelligence")
         
@@ -182,98 +241,6 @@ class TestQueryService:
         assert "Machine Learning" in result.answer
         assert "Deep Learning" in result.answer
 
-    def test_generate_topic_summary_success(self, service, mock_knowledge_graph_service, mock_openai_client):
-        """Test that topic summaries are generated correctly."""
-        mock_notes = [
-            {"id": "note-1", "title": "AI Note", "content": "Content about AI"},
-            {"id": "note-2", "title": "ML Note", "content": "Content about ML"}
-        ]
-        mock_knowledge_graph_service.hybrid_search.return_value = mock_notes
-        
-        mock_response = Mock()
-        mock_response.choices[0].message.content = "AI and ML are computer science fields."
-        mock_openai_client.chat.completions.create.return_value = mock_response
-        
-        result = service.generate_topic_summary("artificial intelligence")
-        
-        assert isinstance(result, QueryResult)
-        assert "AI and ML are computer science fields" in result.answer
-
-    def test_query_with_follow_up(self, service, mock_knowledge_graph_service, mock_openai_client):
-        """Test that follow-up queries work correctly."""
-        # First query
-        mock_notes_1 = [{"id": "note-1", "title": "AI Note", "content": "Content about AI"}]
-        mock_knowledge_graph_service.hybrid_search.return_value = mock_notes_1
-        
-        mock_response_1 = Mock()
-        mock_response_1.choices[0].message.content = "AI is artificial intelligence."
-        mock_openai_client.chat.completions.create.return_value = mock_response_1
-        
-        result_1 = service.query("What is AI?")
-        
-        # Follow-up query
-        mock_notes_2 = [{"id": "note-2", "title": "ML Note", "content": "Content about ML"}]
-        mock_knowledge_graph_service.hybrid_search.return_value = mock_notes_2
-        
-        mock_response_2 = Mock()
-        mock_response_2.choices[0].message.content = "ML is a subset of AI."
-        mock_openai_client.chat.completions.create.return_value = mock_response_2
-        
-        result_2 = service.query("How does it relate to machine learning?", 
-                               conversation_history=[result_1])
-        
-        assert isinstance(result_2, QueryResult)
-        assert "ML is a subset of AI" in result_2.answer
-
-    def test_query_with_conversation_history(self, service, mock_knowledge_graph_service, mock_openai_client):
-        """Test that conversation history is included in prompts."""
-        mock_notes = [{"id": "note-1", "title": "AI Note", "content": "Content about AI"}]
-        mock_knowledge_graph_service.hybrid_search.return_value = mock_notes
-        
-        mock_response = Mock()
-        mock_response.choices[0].message.content = "Based on our previous discussion..."
-        mock_openai_client.chat.completions.create.return_value = mock_response
-        
-        history = [
-            QueryResult(answer="AI is artificial intelligence", query="What is AI?")
-        ]
-        
-        result = service.query("Tell me more", conversation_history=history)
-        
-        assert isinstance(result, QueryResult)
-        assert "Based on our previous discussion" in result.answer
-
-    def test_query_processing_time_measurement(self, service, mock_knowledge_graph_service, mock_openai_client):
-        """Test that processing time is measured correctly."""
-        mock_notes = [{"id": "note-1", "title": "AI Note", "content": "Content about AI"}]
-        mock_knowledge_graph_service.hybrid_search.return_value = mock_notes
-        
-        mock_response = Mock()
-        mock_response.choices[0].message.content = "AI is artificial intelligence."
-        mock_openai_client.chat.completions.create.return_value = mock_response
-        
-        result = service.query("What is AI?")
-        
-        assert result.processing_time > 0
-        assert isinstance(result.processing_time, float)
-
-    def test_query_with_custom_parameters(self, service, mock_knowledge_graph_service, mock_openai_client):
-        """Test that queries work with custom parameters."""
-        mock_notes = [{"id": "note-1", "title": "AI Note", "content": "Content about AI"}]
-        mock_knowledge_graph_service.hybrid_search.return_value = mock_notes
-        
-        mock_response = Mock()
-        mock_response.choices[0].message.content = "AI is artificial intelligence."
-        mock_openai_client.chat.completions.create.return_value = mock_response
-        
-        result = service.query("What is AI?", limit=5, filters={"tags": ["ai"]})
-        
-        assert isinstance(result, QueryResult)
-        # Verify that the knowledge graph service was called with custom parameters
-        mock_knowledge_graph_service.hybrid_search.assert_called_with(
-            "What is AI?", limit=5, filters={"tags": ["ai"]}
-        )
-
     def test_query_error_handling(self, service, mock_knowledge_graph_service):
         """Test that query errors are handled gracefully."""
         mock_knowledge_graph_service.hybrid_search.side_effect = Exception("Search error")
@@ -302,17 +269,636 @@ class TestQueryService:
         assert "Content about AI" in context
         assert "note-1" in context  # Should use ID as fallback
 
-    def test_query_with_special_characters(self, service, mock_knowledge_graph_service, mock_openai_client):
-        """Test that queries with special characters are handled correctly."""
-        mock_notes = [{"id": "note-1", "title": "AI Note", "content": "Content about AI"}]
-        mock_knowledge_graph_service.hybrid_search.return_value = mock_notes
-        
-        mock_response = Mock()
-        mock_response.choices[0].message.content = "AI is artificial intelligence."
-        mock_openai_client.chat.completions.create.return_value = mock_response
-        
-        query = "What is AI? (with examples)"
-        result = service.query(query)
-        
+
+class TestHttpClient:
+    """Test cases for the pooled OpenAI HTTP client."""
+
+    def test_services_share_one_http_client(self):
+        """Test that every QueryService reuses the process-wide pool."""
+        with patch('graphrag.services.query.OpenAI') as mock_openai:
+            QueryService(Mock())
+            QueryService(Mock())
+
+        clients = [c.kwargs["http_client"] for c in mock_openai.call_args_list]
+        assert clients[0] is clients[1] is shared_http_client()
+
+    def test_http_client_uses_configured_timeout(self):
+        """Test that the shared client applies the configured timeouts."""
+        timeout = shared_http_client().timeout
+
+        assert timeout.read == Config.OPENAI_TIMEOUT
+        assert timeout.connect == 2.0
+
+
+class TestSemanticCaching:
+    """Test cases for QueryService semantic caching."""
+
+    @pytest.fixture
+    def kg_service(self):
+        """Mock KnowledgeGraphService returning one note."""
+        kg_service = Mock()
+        kg_service.embed_query.return_value = [1.0, 0.0]
+        kg_service.search_notes.return_value = [Mock(content={
+            'note_path': 'ai.md',
+            'note_title': 'AI Note',
+            'note_content': 'Content about AI',
+        })]
+        return kg_service
+
+    @pytest.fixture
+    def service(self, kg_service, openai_class):
+        """Create a QueryService with a mocked OpenAI client."""
+        set_openai_reply(openai_class.return_value, "According to AI Note...")
+        return QueryService(kg_service, SemanticCache(
+            threshold=0.9, ttl=60, max_entries=10))
+
+    def test_question_vector_is_reused_for_retrieval(self, service, kg_service):
+        """Test that the question is embedded once and passed to search."""
+        service.query("What is AI?", 5)
+
+        kg_service.embed_query.assert_called_once_with("What is AI?")
+        kg_service.search_notes.assert_called_once_with(
+            "What is AI?", 5, query_vector=[1.0, 0.0])
+
+    def test_similar_question_is_served_from_cache(self, service, kg_service):
+        """Test that a repeated question skips retrieval and generation."""
+        kg_service.embed_query.side_effect = [[1.0, 0.0], [0.99, 0.01]]
+        first = service.query("What is AI?", 5)
+        second = service.query("what is ai", 5)
+
+        assert second is first
+        assert kg_service.search_notes.call_count == 1
+        assert service.client.chat.completions.create.call_count == 1
+
+    def test_graph_change_invalidates_cached_answer(self, service, kg_service):
+        """Test that a write to the graph stops earlier answers being reused."""
+        kg_service.generation = 1
+        service.query("What is AI?", 5)
+        kg_service.generation = 2
+        service.query("What is AI?", 5)
+
+        assert kg_service.search_notes.call_count == 2
+
+    @pytest.mark.parametrize("enabled", [False, True])
+    def test_semantic_cache_is_opt_in(self, kg_service, openai_class, enabled):
+        """Test that the default cache stores answers only when enabled."""
+        set_openai_reply(openai_class.return_value, "According to AI Note...")
+        with patch.object(Config, 'SEMANTIC_CACHE_ENABLED', enabled):
+            service = QueryService(kg_service)
+
+        service.query("What is AI?", 5)
+
+        assert len(service.semantic_cache) == int(enabled)
+
+    def test_query_time_is_taken_when_the_query_starts(self, service):
+        """Test that results carry a UTC timestamp from the start of the query."""
+        before = datetime.now(timezone.utc)
+        result = service.query("What is AI?", 5)
+
+        assert result.query_time.tzinfo is timezone.utc
+        assert before <= result.query_time <= datetime.now(timezone.utc)
+
+    def test_failed_answers_are_not_cached(self, service, kg_service):
+        """Test that generation errors are retried rather than cached."""
+        service.client.chat.completions.create.side_effect = Exception("rate limited")
+        service.query("What is AI?", 5)
+        service.query("What is AI?", 5)
+
+        assert kg_service.search_notes.call_count == 2
+        assert len(service.semantic_cache) == 0
+
+    def test_empty_context_skips_llm(self, service, kg_service):
+        """Test that questions with no matching notes never reach the LLM."""
+        kg_service.search_notes.return_value = []
+
+        result = service.query("What is quantum gravity?", 5)
+        streamed = list(service.query_stream("What is quantum gravity?", 5))
+
+        assert result.answer == NO_CONTEXT_ANSWER
+        assert result.confidence == 0.0
+        assert streamed[-1].answer == NO_CONTEXT_ANSWER
+        service.client.chat.completions.create.assert_not_called()
+        assert len(service.semantic_cache) == 0
+
+    def test_embedding_failure_falls_back_to_uncached_query(self, service, kg_service):
+        """Test that queries still run when the question cannot be embedded."""
+        kg_service.embed_query.side_effect = Exception("embedding down")
+
+        result = service.query("What is AI?", 5)
+
+        assert result.answer == "According to AI Note..."
+        kg_service.search_notes.assert_called_once_with(
+            "What is AI?", 5, query_vector=None)
+
+    def test_repeated_question_is_embedded_once(self, service, kg_service):
+        """Test that question embeddings are served from the LRU."""
+        first = service._embed_question("What is AI?")
+        second = service._embed_question("What is AI?")
+
+        assert second is first
+        assert first.dtype == np.float32
+        kg_service.embed_query.assert_called_once_with("What is AI?")
+
+    def test_question_embedding_lru_is_bounded(self, service, kg_service):
+        """Test that the least recently used embedding is evicted."""
+        with patch.object(Config, 'QUERY_EMBEDDING_CACHE_SIZE', 2):
+            service._embed_question("a")
+            service._embed_question("b")
+            service._embed_question("a")
+            service._embed_question("c")
+            service._embed_question("a")
+            service._embed_question("b")
+
+        assert kg_service.embed_query.call_count == 4
+
+
+class TestAnswerCaching:
+    """Test cases for the persistent answer cache in QueryService."""
+
+    @pytest.fixture
+    def kg_service(self):
+        """Mock KnowledgeGraphService returning one note."""
+        kg_service = Mock()
+        kg_service.embed_query.side_effect = Exception("embedding down")
+        kg_service.search_notes.return_value = [Mock(content={
+            'note_path': 'ai.md',
+            'note_title': 'AI Note',
+            'note_content': 'Content about AI',
+        })]
+        return kg_service
+
+    @pytest.fixture
+    def make_service(self, kg_service, openai_class):
+        """Build QueryServices sharing one on-disk answer cache."""
+        set_openai_reply(openai_class.return_value, "According to AI Note...")
+        return lambda cache: QueryService(kg_service, answer_cache=cache)
+
+    def test_answer_is_reused_across_services(self, make_service, tmp_path):
+        """Test that a second process-like service reuses a stored answer."""
+        path = str(tmp_path / "answers.sqlite3")
+        first = make_service(AnswerCache(path, ttl=60))
+        first.query("What is AI?", 5)
+
+        second = make_service(AnswerCache(path, ttl=60))
+        result = second.query("What is AI?", 5)
+
+        assert result.answer == "According to AI Note..."
+        assert second.client.chat.completions.create.call_count == 1
+
+    def test_answer_cache_disabled_by_default(self, make_service):
+        """Test that no answer cache is opened unless a path is configured."""
+        with patch.object(Config, 'ANSWER_CACHE_PATH', ''):
+            assert make_service(None).answer_cache is None
+
+
+class TestAsyncQueries:
+    """Test cases for the async QueryService methods."""
+
+    @pytest.fixture
+    def kg_service(self):
+        """Mock KnowledgeGraphService returning one note."""
+        kg_service = Mock()
+        kg_service.embed_query.return_value = [1.0, 0.0]
+        kg_service.search_notes.return_value = [Mock(content={
+            'note_path': 'ai.md',
+            'note_title': 'AI Note',
+            'note_content': 'Content about AI',
+        })]
+        return kg_service
+
+    @pytest.fixture
+    def service(self, kg_service, openai_class):
+        """Create a QueryService with a mocked async OpenAI client."""
+        with patch('graphrag.services.query.AsyncOpenAI') as mock_async_openai:
+            mock_async_openai.return_value.chat.completions.create = AsyncMock(
+                return_value=completion("According to AI Note..."))
+            yield QueryService(kg_service, SemanticCache(
+                threshold=0.9, ttl=60, max_entries=10))
+
+    @pytest.mark.asyncio
+    async def test_aquery_success(self, service, kg_service):
+        """Test that aquery retrieves context and generates an answer."""
+        result = await service.aquery("What is AI?", 5)
+
+        assert result.answer == "According to AI Note..."
+        assert result.citations == ["AI Note (ai.md)"]
+        kg_service.search_notes.assert_called_once_with(
+            "What is AI?", 5, query_vector=[1.0, 0.0])
+
+    @pytest.mark.asyncio
+    async def test_aquery_uses_semantic_cache(self, service, kg_service):
+        """Test that aquery shares the semantic cache with query."""
+        first = await service.aquery("What is AI?", 5)
+        second = await service.aquery("What is AI?", 5)
+
+        assert second is first
+        assert service.aclient.chat.completions.create.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_aquery_generation_error(self, service):
+        """Test that completion errors are reported in the answer."""
+        service.aclient.chat.completions.create.side_effect = Exception("rate limited")
+
+        result = await service.aquery("What is AI?", 5)
+
+        assert "rate limited" in result.answer
+        assert result.citations == []
+
+    @pytest.mark.asyncio
+    async def test_aget_topic_summaries_preserves_order(self, service):
+        """Test that concurrent topic summaries are returned in input order."""
+        async def complete(**kwargs):
+            topic = kwargs["messages"][1]["content"].split("'")[1]
+            return completion(f"Summary of {topic}")
+
+        service.aclient.chat.completions.create.side_effect = complete
+
+        summaries = await service.aget_topic_summaries(["AI", "ML", "NLP"])
+
+        assert summaries == ["Summary of AI", "Summary of ML", "Summary of NLP"]
+
+    @pytest.mark.asyncio
+    async def test_aquery_empty_context_skips_llm(self, service, kg_service):
+        """Test that aquery answers without the LLM when nothing matches."""
+        kg_service.search_notes.return_value = []
+
+        result = await service.aquery("What is quantum gravity?", 5)
+
+        assert result.answer == NO_CONTEXT_ANSWER
+        service.aclient.chat.completions.create.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_aget_topic_summary_without_notes(self, service, kg_service):
+        """Test that topics without matching notes skip the LLM call."""
+        kg_service.search_notes.return_value = []
+
+        summary = await service.aget_topic_summary("Quantum")
+
+        assert "No information found about 'Quantum'" in summary
+        service.aclient.chat.completions.create.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_abatch_query_embeds_questions_once(self, service, kg_service):
+        """Test that a batch embeds all questions in a single request."""
+        kg_service.embed_queries.return_value = [[1.0, 0.0], [0.0, 1.0]]
+
+        results = await service.abatch_query(["What is AI?", "What is ML?"], 5)
+
+        assert [r.answer for r in results] == ["According to AI Note..."] * 2
+        kg_service.embed_queries.assert_called_once_with(["What is AI?", "What is ML?"])
+        kg_service.embed_query.assert_not_called()
+
+    def test_batch_query_falls_back_to_single_embeddings(self, service, kg_service):
+        """Test that a failed batch embedding still answers every question."""
+        kg_service.embed_queries.side_effect = Exception("embedding down")
+
+        results = service.batch_query(["What is AI?", "What is ML?"], 5)
+        results += service.batch_query(["What is DL?"], 5)
+
+        assert len(results) == 3
+        assert kg_service.embed_query.call_count == 3
+
+    def test_batch_query_uses_a_client_per_event_loop(self, service, kg_service):
+        """Test that repeated batches never reuse a client from a closed loop."""
+        kg_service.embed_queries.return_value = [[1.0, 0.0]]
+        service.semantic_cache = SemanticCache(max_entries=0)
+        loops = {}
+
+        def make_client(**kwargs):
+            client = Mock()
+
+            async def complete(**kwargs):
+                loops.setdefault(id(client), set()).add(asyncio.get_running_loop())
+                return completion("According to AI Note...")
+
+            client.chat.completions.create = complete
+            return client
+
+        with patch('graphrag.services.query.AsyncOpenAI', side_effect=make_client):
+            service.batch_query(["What is AI?"], 5)
+            service.batch_query(["What is ML?"], 5)
+
+        assert len(loops) == 2
+        assert all(len(client_loops) == 1 for client_loops in loops.values())
+
+
+class TestStreaming:
+    """Test cases for streamed answers."""
+
+    @pytest.fixture
+    def kg_service(self):
+        """Mock KnowledgeGraphService returning one note."""
+        kg_service = Mock()
+        kg_service.embed_query.return_value = [1.0, 0.0]
+        kg_service.search_notes.return_value = [Mock(content={
+            'note_path': 'ai.md',
+            'note_title': 'AI Note',
+            'note_content': 'Content about AI',
+        })]
+        return kg_service
+
+    @pytest.fixture
+    def service(self, kg_service, openai_class):
+        """Create a QueryService whose client streams three chunks."""
+        chunks = []
+        for text in ["According to ", "AI Note", None]:
+            chunk = Mock()
+            chunk.choices = [Mock()]
+            chunk.choices[0].delta.content = text
+            chunks.append(chunk)
+        openai_class.return_value.chat.completions.create.return_value = iter(chunks)
+        return QueryService(kg_service, SemanticCache(
+            threshold=0.9, ttl=60, max_entries=10))
+
+    def test_query_stream_yields_chunks_then_result(self, service):
+        """Test that text chunks arrive before the final QueryResult."""
+        items = list(service.query_stream("What is AI?", 5))
+
+        assert items[:-1] == ["According to ", "AI Note", ""]
+        result = items[-1]
         assert isinstance(result, QueryResult)
-        assert result.query == query 
\ No newline at end of file
+        assert result.answer == "According to AI Note"
+        assert result.citations == ["AI Note (ai.md)"]
+        assert service.client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    def test_query_stream_serves_cached_answer(self, service):
+        """Test that a cached answer is streamed without calling the LLM."""
+        first = list(service.query_stream("What is AI?", 5))[-1]
+
+        items = list(service.query_stream("What is AI?", 5))
+
+        assert items == [first.answer, first]
+        assert service.client.chat.completions.create.call_count == 1
+
+    def test_query_stream_error(self, service):
+        """Test that stream failures yield the error text, then an error result."""
+        service.client.chat.completions.create.side_effect = Exception("timeout")
+
+        items = list(service.query_stream("What is AI?", 5))
+
+        assert len(items) == 2
+        assert isinstance(items[1], QueryResult)
+        assert "timeout" in items[1].answer
+        assert items[0] == items[1].answer
+        assert len(service.semantic_cache) == 0
+
+
+class TestResultParsing:
+    """Test cases for converting search results into notes."""
+
+    @pytest.fixture
+    def service(self, openai_class):
+        """Create a QueryService with mocked dependencies."""
+        return QueryService(Mock())
+
+    def test_dict_results_are_used_directly(self, service):
+        """Test that dict payloads become notes without parsing."""
+        service.kg_service.search_notes.return_value = [Mock(content={
+            'note_path': 'ai.md', 'note_title': 'AI', 'note_content': 'About AI'})]
+
+        notes = service._retrieve_context("What is AI?", 5)
+
+        assert [(n.title, n.file_path, n.content) for n in notes] == [
+            ("AI", "ai.md", "About AI")]
+
+    def test_json_string_results_are_parsed(self, service):
+        """Test that legacy JSON string payloads are still accepted."""
+        service.kg_service.search_notes.return_value = [Mock(content=json.dumps({
+            'note_path': 'ai.md', 'note_title': 'AI', 'note_content': 'About AI'}))]
+
+        notes = service._retrieve_context("What is AI?", 5)
+
+        assert [n.title for n in notes] == ["AI"]
+
+    def test_unparseable_results_are_skipped(self, service):
+        """Test that results that are not note dicts are dropped."""
+        service.kg_service.search_notes.return_value = [
+            Mock(content="<Record note_title='AI'>"), Mock(content="[1, 2]")]
+
+        assert service._retrieve_context("What is AI?", 5) == []
+
+
+class TestCitationExtraction:
+    """Test cases for citation extraction."""
+
+    @pytest.fixture
+    def service(self, openai_class):
+        """Create a QueryService with mocked dependencies."""
+        return QueryService(Mock())
+
+    def test_only_mentioned_titles_are_cited(self, service):
+        """Test that notes whose titles appear in the answer are cited."""
+        notes = [Note(title="AI", file_path="ai.md", content=""),
+                 Note(title="Cooking", file_path="cooking.md", content="")]
+
+        citations = service._extract_citations("According to AI...", notes)
+
+        assert citations == ["AI (ai.md)"]
+
+    def test_notes_sharing_a_title_are_all_cited(self, service):
+        """Test that duplicate titles cite every matching note."""
+        notes = [Note(title="AI", file_path="a/ai.md", content=""),
+                 Note(title="AI", file_path="b/ai.md", content="")]
+
+        citations = service._extract_citations("According to AI...", notes)
+
+        assert citations == ["AI (a/ai.md)", "AI (b/ai.md)"]
+
+    def test_empty_titles_are_not_matched(self, service):
+        """Test that untitled notes are not cited for every answer."""
+        notes = [Note(title="AI", file_path="ai.md", content=""),
+                 Note(title="", file_path="untitled.md", content="")]
+
+        citations = service._extract_citations("According to AI...", notes)
+
+        assert citations == ["AI (ai.md)"]
+
+    def test_all_notes_cited_when_none_mentioned(self, service):
+        """Test the fallback to citing every context note."""
+        notes = [Note(title="AI", file_path="ai.md", content="")]
+
+        assert service._extract_citations("No idea.", notes) == ["AI (ai.md)"]
+
+    def test_overlapping_titles_are_all_cited(self, service):
+        """Test that a title contained in a longer cited title still matches."""
+        notes = [Note(title="AI Ethics", file_path="ethics.md", content=""),
+                 Note(title="AI", file_path="ai.md", content=""),
+                 Note(title="Ethics", file_path="e.md", content="")]
+
+        citations = service._extract_citations("See AI Ethics.", notes)
+
+        assert citations == ["AI Ethics (ethics.md)", "AI (ai.md)", "Ethics (e.md)"]
+
+    def test_duplicate_citations_are_collapsed(self, service):
+        """Test that a note appearing twice in context is cited once."""
+        note = Note(title="AI", file_path="ai.md", content="")
+
+        assert service._extract_citations("AI...", [note, note]) == ["AI (ai.md)"]
+
+
+class TestPromptBuilding:
+    """Test cases for LLM prompt construction."""
+
+    @pytest.fixture
+    def service(self, openai_class):
+        """Create a QueryService with mocked dependencies."""
+        return QueryService(Mock())
+
+    def test_context_lists_each_note(self, service):
+        """Test that every note is rendered with its title, path and content."""
+        notes = [Note(title="AI", file_path="ai.md", content="About AI"),
+                 Note(title="ML", file_path="ml.md", content="About ML")]
+
+        context = service._prepare_context_for_llm(notes)
+
+        assert context == (
+            "Note 1: AI\nFile: ai.md\nContent: About AI\n---\n"
+            "Note 2: ML\nFile: ml.md\nContent: About ML\n---")
+
+    def test_context_truncates_note_content(self, service):
+        """Test that long notes are cut to the configured length."""
+        notes = [Note(title="Long", file_path="long.md", content="x" * 50)]
+
+        with patch.object(Config, 'NOTE_SUMMARY_LENGTH', 10):
+            context = service._prepare_context_for_llm(notes)
+
+        assert "Content: " + "x" * 10 + "\n" in context
+
+    def test_answer_prompt_keeps_braces_in_question(self, service):
+        """Test that braces in user input are not treated as placeholders."""
+        prompt = service._create_answer_generation_prompt("What is {x}?", "ctx")
+
+        assert prompt.startswith("Question: What is {x}?\n")
+        assert "Context Notes:\nctx\n" in prompt
+
+    def test_context_fits_token_budget(self, service):
+        """Test that many long notes are trimmed to fit the prompt budget."""
+        notes = [Note(title=f"N{i}", file_path=f"{i}.md", content="x" * 1000)
+                 for i in range(20)]
+
+        with patch.object(Config, 'MAX_CONTEXT_TOKENS', 1000):
+            context = service._prepare_context_for_llm(notes)
+
+        assert len(context) <= 1000 * 4
+        assert context.count("Note ") == 20
+
+    def test_unused_budget_goes_to_later_notes(self, service):
+        """Test that short notes leave their share to the notes after them."""
+        notes = [Note(title="Short", file_path="s.md", content="tiny"),
+                 Note(title="Long", file_path="l.md", content="x" * 1000)]
+
+        with patch.object(Config, 'MAX_CONTEXT_TOKENS', 100):
+            context = service._prepare_context_for_llm(notes)
+
+        assert context.count("x") > 200
+        assert len(context) <= 400
+
+    def test_prompt_parts_rebuild_templates(self):
+        """Test that the split templates reproduce str.format output."""
+        question, context = "What is AI?", "Note 1: AI"
+
+        assert "".join((ANSWER_PROMPT_PARTS[0], question, ANSWER_PROMPT_PARTS[1],
+                        context, ANSWER_PROMPT_PARTS[2])) == \
+            ANSWER_PROMPT_TEMPLATE.format(question=question, context=context)
+        assert "".join((TOPIC_SUMMARY_PROMPT_PARTS[0], "AI", TOPIC_SUMMARY_PROMPT_PARTS[1],
+                        context, TOPIC_SUMMARY_PROMPT_PARTS[2])) == \
+            TOPIC_SUMMARY_PROMPT_TEMPLATE.format(topic="AI", context=context)
+
+
+    def test_messages_prepare_context_once(self, service):
+        """Test that answer and summary prompts render the context a single time."""
+        notes = [Note(title="AI", file_path="ai.md", content="About AI")]
+
+        with patch.object(service, '_prepare_context_for_llm',
+                          return_value="ctx") as prepare:
+            answer = service._answer_messages("What is AI?", notes)
+            summary = service._topic_summary_messages("AI", notes)
+
+        assert prepare.call_count == 2
+        assert answer[1]["content"] == service._create_answer_generation_prompt(
+            "What is AI?", "ctx")
+        assert summary[1]["content"] == TOPIC_SUMMARY_PROMPT_TEMPLATE.format(
+            topic="AI", context="ctx")
+
+
+class TestSimilarEntities:
+    """Test cases for finding similar entities."""
+
+    @pytest.fixture
+    def service(self, openai_class):
+        """Create a QueryService with mocked dependencies."""
+        return QueryService(Mock())
+
+    def test_entities_are_deduplicated_in_note_order(self, service):
+        """Test that each entity is reported once, from its first note."""
+        service.kg_service.get_related_notes.return_value = [
+            {"note": {"title": "A", "file_path": "a.md"},
+             "other_entities": ["AI", "Neural Networks", "Python"]},
+            {"note": {"title": "B", "file_path": "b.md"},
+             "other_entities": ["Python", "AI", "Turing"]},
+        ]
+
+        entities = service.get_similar_entities("AI", limit=5)
+
+        assert entities == [
+            {"entity_name": "Neural Networks", "source_note": "A", "note_path": "a.md"},
+            {"entity_name": "Python", "source_note": "A", "note_path": "a.md"},
+            {"entity_name": "Turing", "source_note": "B", "note_path": "b.md"},
+        ]
+
+    def test_results_respect_limit(self, service):
+        """Test that no more than limit entities are returned."""
+        service.kg_service.get_related_notes.return_value = [
+            {"note": {"title": "A", "file_path": "a.md"},
+             "other_entities": [f"E{i}" for i in range(10)]},
+        ]
+
+        assert len(service.get_similar_entities("AI", limit=3)) == 3
+
+
+class TestSharedService:
+    """Test cases for the process-wide QueryService."""
+
+    @pytest.fixture(autouse=True)
+    def reset_shared(self):
+        """Isolate the shared instance between tests."""
+        with patch.object(QueryService, '_shared', None):
+            yield
+
+    def test_same_instance_is_returned(self):
+        """Test that repeated lookups share one service."""
+        kg_service = Mock()
+
+        assert get_query_service(kg_service) is get_query_service(kg_service)
+
+    def test_concurrent_first_use_creates_one_instance(self):
+        """Test that racing threads still build a single service."""
+        kg_service = Mock()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            QueryService.shared(kg_service))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len({id(service) for service in results}) == 1
+
+    def test_new_graph_service_replaces_instance(self):
+        """Test that a different knowledge graph gets its own service."""
+        first = get_query_service(Mock())
+        second = get_query_service(Mock())
+
+        assert first is not second
+
+    def test_warmup_embeds_questions_in_one_request(self):
+        """Test that warmup fills the question embedding LRU."""
+        kg_service = Mock()
+        kg_service.embed_queries.return_value = [[1.0, 0.0], [0.0, 1.0]]
+        service = get_query_service(kg_service)
+
+        service.warmup(["What is AI?", "What is ML?"])
+        service._embed_question("What is AI?")
+
+        kg_service.embed_queries.assert_called_once()
+        kg_service.embed_query.assert_not_called()
@@ -0,0 +1,96 @@
+"""Tests for the SemanticCache."""
+
+from unittest.mock import patch
+
+import pytest
+
+from graphrag.models import QueryResult
+from graphrag.services.semantic_cache import SemanticCache
+
+
+def make_result(answer: str) -> QueryResult:
+    """Build a minimal QueryResult."""
+    return QueryResult(answer=answer, context_notes=[], citations=[], confidence=0.8)
+
+
+class TestSemanticCache:
+    """Test cases for SemanticCache."""
+
+    @pytest.fixture
+    def cache(self):
+        """Create a SemanticCache with explicit limits."""
+        return SemanticCache(threshold=0.9, ttl=60, max_entries=3)
+
+    def test_empty_cache_misses(self, cache):
+        """Test that lookups on an empty cache miss."""
+        assert cache.lookup([1.0, 0.0], 20) is None
+        assert cache.misses == 1
+
+    def test_similar_question_hits(self, cache):
+        """Test that a near-identical embedding returns the cached result."""
+        result = make_result("cached")
+        cache.add([1.0, 0.0], 20, result)
+
+        assert cache.lookup([0.99, 0.05], 20) is result
+        assert cache.hits == 1
+
+    def test_dissimilar_question_misses(self, cache):
+        """Test that embeddings below the threshold miss."""
+        cache.add([1.0, 0.0], 20, make_result("cached"))
+
+        assert cache.lookup([0.0, 1.0], 20) is None
+
+    def test_context_size_must_match(self, cache):
+        """Test that results are only reused for the same context size."""
+        cache.add([1.0, 0.0], 20, make_result("cached"))
+
+        assert cache.lookup([1.0, 0.0], 5) is None
+
+    def test_best_match_is_returned(self, cache):
+        """Test that the most similar entry wins."""
+        cache.add([1.0, 0.2], 20, make_result("near"))
+        cache.add([1.0, 0.0], 20, make_result("exact"))
+
+        assert cache.lookup([1.0, 0.0], 20).answer == "exact"
+
+    def test_oldest_entries_are_evicted(self, cache):
+        """Test that the cache never grows past max_entries."""
+        for i in range(5):
+            vector = [0.0] * 5
+            vector[i] = 1.0
+            cache.add(vector, 20, make_result(str(i)))
+
+        assert len(cache) == 3
+        assert cache.lookup([1.0, 0.0, 0.0, 0.0, 0.0], 20) is None
+        assert cache.lookup([0.0, 0.0, 0.0, 0.0, 1.0], 20).answer == "4"
+
+    def test_entries_expire_after_ttl(self, cache):
+        """Test that entries older than the TTL are not returned."""
+        with patch("graphrag.services.semantic_cache.time.monotonic", return_value=0.0):
+            cache.add([1.0, 0.0], 20, make_result("cached"))
+
+        with patch("graphrag.services.semantic_cache.time.monotonic", return_value=61.0):
+            assert cache.lookup([1.0, 0.0], 20) is None
+        assert len(cache) == 0
+
+    def test_zero_max_entries_disables_cache(self):
+        """Test that a cache with no capacity stores nothing."""
+        cache = SemanticCache(threshold=0.9, ttl=60, max_entries=0)
+        cache.add([1.0, 0.0], 20, make_result("cached"))
+
+        assert len(cache) == 0
+
+    def test_new_generation_clears_cache(self, cache):
+        """Test that a lookup from a newer graph generation drops old answers."""
+        cache.lookup([1.0, 0.0], 20, generation=1)
+        cache.add([1.0, 0.0], 20, make_result("cached"), generation=1)
+
+        assert cache.lookup([1.0, 0.0], 20, generation=2) is None
+        assert len(cache) == 0
+
+    def test_answers_from_older_generation_are_not_stored(self, cache):
+        """Test that an answer built before a graph change is dropped."""
+        cache.lookup([1.0, 0.0], 20, generation=2)
+        cache.add([1.0, 0.0], 20, make_result("stale"), generation=1)
+
+        assert len(cache) == 0
@@ -0,0 +1,81 @@
+"""Tests for the NoteVectorIndex."""
+
+import pytest
+
+from graphrag.services.vector_index import NoteVectorIndex
+
+
+class TestNoteVectorIndex:
+    """Test cases for NoteVectorIndex."""
+
+    @pytest.fixture
+    def index(self):
+        """Create an index holding three 2-d vectors."""
+        index = NoteVectorIndex(dimensions=2, capacity=2)
+        index.upsert_many({
+            "x.md": [1.0, 0.0],
+            "y.md": [0.0, 1.0],
+            "xy.md": [1.0, 1.0],
+        })
+        return index
+
+    def test_search_orders_by_similarity(self, index):
+        """Test that the most similar notes come first."""
+        hits = index.search([1.0, 0.1], 2)
+
+        assert [path for path, _ in hits] == ["x.md", "xy.md"]
+        assert hits[0][1] == pytest.approx(0.995, abs=1e-3)
+
+    def test_search_returns_everything_when_k_exceeds_size(self, index):
+        """Test that k larger than the index returns all notes."""
+        assert len(index.search([1.0, 0.0], 10)) == 3
+
+    def test_empty_index_returns_no_hits(self):
+        """Test that searching an empty index is safe."""
+        assert NoteVectorIndex(dimensions=2).search([1.0, 0.0], 5) == []
+
+    def test_upsert_replaces_existing_vector(self, index):
+        """Test that re-embedding a note replaces its vector."""
+        index.upsert_many({"x.md": [0.0, 1.0]})
+
+        assert len(index) == 3
+        assert index.search([1.0, 0.0], 1)[0][0] == "xy.md"
+
+    def test_remove_keeps_remaining_rows(self, index):
+        """Test that removing a note leaves the others searchable."""
+        index.remove("x.md")
+        index.remove("missing.md")
+
+        assert "x.md" not in index
+        assert [path for path, _ in index.search([1.0, 0.0], 3)] == ["xy.md", "y.md"]
+
+    def test_rename_rekeys_vector(self, index):
+        """Test that a moved note keeps its vector under the new path."""
+        index.rename("x.md", "moved.md")
+
+        assert "x.md" not in index
+        assert index.search([1.0, 0.0], 1)[0][0] == "moved.md"
+
+    def test_rename_replaces_note_at_destination(self, index):
+        """Test that moving onto an existing path drops the old note."""
+        index.rename("x.md", "y.md")
+
+        assert len(index) == 2
+        assert index.search([1.0, 0.0], 1)[0][0] == "y.md"
+
+    def test_load_replaces_contents(self, index):
+        """Test that loading discards previously indexed notes."""
+        index.load([("z.md", [1.0, 0.0])])
+
+        assert len(index) == 1
+        assert "x.md" not in index
+
+    def test_float16_storage_matches_float32_ranking(self, index):
+        """Test that half-precision storage ranks notes the same way."""
+        half = NoteVectorIndex(dimensions=2, capacity=2, dtype="float16")
+        half.SCORE_CHUNK_ROWS = 2
+        half.upsert_many({"x.md": [1.0, 0.0], "y.md": [0.0, 1.0], "xy.md": [1.0, 1.0]})
+
+        assert half._vectors.dtype == "float16"
+        assert [p for p, _ in half.search([1.0, 0.1], 3)] == \
+            [p for p, _ in index.search([1.0, 0.1], 3)]